@@ -0,0 +1,137 @@
+"""
+End-to-end throughput benchmark of the refresh pipeline against a local fake GraphQL server.
+
+Each scenario runs in a fresh subprocess (so peak RSS is per scenario) and reports
+developers per second, p50/p99 request latency, peak RSS and the storage write time.
+
+Usage:
+    python benchmarks/bench_end_to_end.py --developers 100,1000,10000 --concurrency 8 --batch-size 10
+"""
+import argparse
+import json
+import logging
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_graphql_server import FakeGitHubServer  # noqa: E402
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def write_roster(filepath, count):
+    with open(filepath, "w") as roster:
+        roster.write("username,fullname\n")
+        for i in range(count):
+            roster.write(f"dev{i},Developer {i}\n")
+
+
+def run_scenario(args):
+    """
+    Run one scenario in this process against the server at args.api_url and return its results.
+    """
+    import main
+    from github_handler import GitHubHandler, RequestScheduler, create_session
+    from storage import open_storage
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    latencies = []
+    session = create_session(max(GitHubHandler.DEFAULT_POOL_SIZE, args.concurrency))
+    post = session.post
+
+    def timed_post(*post_args, **post_kwargs):
+        start = time.perf_counter()
+        try:
+            return post(*post_args, **post_kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    session.post = timed_post
+
+    with tempfile.TemporaryDirectory() as directory:
+        data_file = os.path.join(directory, f"developers{args.storage_extension}")
+        roster_file = os.path.join(directory, "roster.csv")
+        write_roster(roster_file, args.scenario)
+
+        storage = open_storage(data_file, None)
+        storage.import_csv(roster_file)
+
+        handler = GitHubHandler(
+            "fake_token", args.api_url,
+            batch_size=args.batch_size,
+            session=session,
+            scheduler=RequestScheduler(requests_per_minute=args.requests_per_minute)
+        )
+        run_args = main.parse_args([
+            "--batch-size", str(args.batch_size),
+            "--concurrency", str(args.concurrency),
+        ])
+
+        start = time.perf_counter()
+        developers = storage.filter_by_last_updated()
+        updated = main.process_developers(developers, handler, run_args)
+        fetch_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        storage.append_metrics(updated)
+        write_seconds = time.perf_counter() - start
+
+    return {
+        "developers": args.scenario,
+        "updated": len(updated),
+        "developers_per_second": args.scenario / (fetch_seconds + write_seconds),
+        "requests": len(latencies),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "write_ms": write_seconds * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against a fake GitHub API.")
+    parser.add_argument("--developers", type=str, default="100,1000,10000",
+                        help="Comma-separated roster sizes to run (default: 100,1000,10000)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+    parser.add_argument("--rate-limit", type=int, default=1000000, help="Server rate limit points per hour")
+    parser.add_argument("--requests-per-minute", type=int, default=0,
+                        help="Client-side secondary limit pacing, 0 to disable (default: 0)")
+    parser.add_argument("--storage-extension", type=str, default=".csv", help="Storage backend: .csv or .db")
+    parser.add_argument("--scenario", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--api-url", type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args)))
+        return
+
+    server = FakeGitHubServer(latency=args.latency, error_rate=args.error_rate, rate_limit=args.rate_limit)
+    with server:
+        print(f"{'developers':>10} {'dev/s':>10} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} "
+              f"{'peak RSS MB':>12} {'write ms':>9}")
+        for count in (int(value) for value in args.developers.split(",")):
+            command = [sys.executable, __file__, *sys.argv[1:], "--scenario", str(count), "--api-url", server.url]
+            output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{result['developers']:>10} {result['developers_per_second']:>10.1f} {result['requests']:>9} "
+                  f"{result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['peak_rss_mb']:>12.1f} "
+                  f"{result['write_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
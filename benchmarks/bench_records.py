@@ -0,0 +1,99 @@
+"""
+Compare the memory and time of dict records and DeveloperRecords through the pipeline's
+load -> update -> write path on a synthetic roster.
+
+Usage: python benchmarks/bench_records.py [--developers 100000] [--windows 30,90]
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from csv_handler import SCHEMA, records_frame  # noqa: E402
+from developer_record import DeveloperRecord  # noqa: E402
+from utils import WINDOW_METRICS, window_column  # noqa: E402
+
+
+def synthetic_roster(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'username': [f"user{i}" for i in range(count)],
+        'fullname': [f"Developer {i}" for i in range(count)],
+        'commits': rng.integers(0, 1000, count),
+        'pull_requests': rng.integers(0, 150, count),
+        'reviews': rng.integers(0, 150, count),
+        'repositories_contributed': rng.integers(0, 40, count),
+        'lines_added': rng.integers(0, 400000, count),
+        'lines_removed': rng.integers(0, 400000, count),
+        'score': rng.integers(0, 500, count),
+        'last_updated': "2025-01-01",
+        'manager': "Manager",
+    }, columns=SCHEMA)
+
+
+def window_metrics(windows):
+    return {window_column(name, window): 1 for name in WINDOW_METRICS for window in windows}
+
+
+def dict_pipeline(df, metrics):
+    records = df.to_dict(orient='records')
+    for record in records:
+        record.update(metrics)
+    return records, lambda: pd.DataFrame(records)
+
+
+def record_pipeline(df, metrics):
+    records = DeveloperRecord.from_frame(df)
+    for record in records:
+        record.update(metrics)
+    return records, lambda: records_frame(records)
+
+
+def measure(pipeline, df, metrics):
+    """
+    Return the memory held by the records, the peak while building the output frame, and the
+    time taken (timed on a separate run, as tracing allocations slows everything down).
+    """
+    start = time.perf_counter()
+    records, to_frame = pipeline(df, metrics)
+    to_frame()
+    elapsed = (time.perf_counter() - start) * 1000
+    del records, to_frame
+
+    gc.collect()
+    tracemalloc.start()
+    records, to_frame = pipeline(df, metrics)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    frame = to_frame()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert len(frame) == len(df)
+    return held, peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark developer record memory.")
+    parser.add_argument("--developers", type=int, default=100000)
+    parser.add_argument("--windows", default="", help="Comma-separated windows whose metrics are added to each record.")
+    args = parser.parse_args()
+
+    df = synthetic_roster(args.developers)
+    metrics = window_metrics([int(window) for window in args.windows.split(",") if window])
+
+    print(f"Developers: {args.developers}, extra columns: {len(metrics)}")
+    for name, pipeline in (("dicts", dict_pipeline), ("DeveloperRecord", record_pipeline)):
+        held, peak, elapsed = measure(pipeline, df, metrics)
+        print(f"{name:16} records {held / 2**20:8.1f} MiB   "
+              f"peak while framing {peak / 2**20:8.1f} MiB   {elapsed:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
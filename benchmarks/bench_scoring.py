@@ -0,0 +1,65 @@
+"""
+Compare scalar and vectorized scoring/categorization on a synthetic roster.
+
+Usage: python benchmarks/bench_scoring.py [--developers 100000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from utils import (  # noqa: E402
+    calculate_productivity_score, calculate_productivity_scores,
+    categorize_developers, categorize_developers_batch
+)
+
+
+def synthetic_metrics(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'fullname': [f"Developer {i}" for i in range(count)],
+        'commits': rng.integers(0, 1000, count),
+        'pull_requests': rng.integers(0, 150, count),
+        'reviews': rng.integers(0, 150, count),
+        'repositories_contributed': rng.integers(0, 40, count),
+        'lines_added': rng.integers(0, 400000, count),
+        'lines_removed': rng.integers(0, 400000, count),
+    })
+
+
+def timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark developer scoring.")
+    parser.add_argument("--developers", type=int, default=100000)
+    args = parser.parse_args()
+
+    df = synthetic_metrics(args.developers)
+    columns = ['commits', 'pull_requests', 'reviews', 'repositories_contributed', 'lines_added', 'lines_removed']
+    records = df[columns].to_dict(orient='records')
+
+    scalar_scores, scalar_score_ms = timed(lambda: [calculate_productivity_score(**row) for row in records])
+    vector_scores, vector_score_ms = timed(lambda: calculate_productivity_scores(df))
+    assert vector_scores.tolist() == scalar_scores
+
+    developers = [{'fullname': name, 'score': score} for name, score in zip(df['fullname'], scalar_scores)]
+    scalar_categories, scalar_tier_ms = timed(lambda: categorize_developers(developers))
+    vector_categories, vector_tier_ms = timed(lambda: categorize_developers_batch(df['fullname'], vector_scores))
+    assert vector_categories == scalar_categories
+
+    print(f"Developers: {args.developers}")
+    print(f"Scoring:        scalar {scalar_score_ms:9.1f} ms   vectorized {vector_score_ms:9.1f} ms")
+    print(f"Categorization: scalar {scalar_tier_ms:9.1f} ms   vectorized {vector_tier_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+"""
+Local stand-in for the GitHub GraphQL API, answering the queries sent by GitHubHandler
+(single-user, aliased batches, pull request pages and pull request searches) with synthetic, deterministic users.
+
+Usage: python benchmarks/fake_graphql_server.py [--port 8000] [--latency 0.05] [--error-rate 0.01]
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ALIAS_PATTERN = re.compile(r"(\w+):\s*user\(login:\s*\$(\w+)\)")
+SINGLE_PATTERN = re.compile(r"\buser\(login:\s*\$(\w+)\)")
+WINDOW_PATTERN = re.compile(r"(contributions_(\d+)d):\s*contributionsCollection")
+SEARCH_AUTHOR_PATTERN = re.compile(r"\bauthor:(\S+)")
+SEARCH_MERGED_PATTERN = re.compile(r"\bmerged:>=(\S+)")
+
+
+def synthetic_user(username, page_size=100, windows=()):
+    """
+    Build a user payload whose numbers are derived from the username, so runs are reproducible.
+    Logins starting with "ghost" do not exist. Each `(alias, days)` in `windows` adds a
+    contributionsCollection scaled down to that many days of the year.
+    """
+    if username.startswith("ghost"):
+        return None
+
+    seed = int(hashlib.md5(username.encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    orgs = [f"org{rng.randint(0, 9)}" for _ in range(rng.randint(0, 3))]
+    pull_requests = [
+        {
+            "id": f"{username}-pr{i}",
+            "mergedAt": (now - timedelta(days=i * 3)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "updatedAt": (now - timedelta(days=i * 3)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "additions": rng.randint(0, 2000),
+            "deletions": rng.randint(0, 1000),
+        }
+        for i in range(rng.randint(0, page_size))
+    ]
+    repos = [
+        {"nameWithOwner": f"{owner}/repo{i}", "owner": {"login": owner}}
+        for i, owner in enumerate(rng.choice(orgs + [username]) for _ in range(rng.randint(0, 30)))
+    ]
+
+    contributions = {
+        # Answers activity probes: about a quarter of the users have contributed since their last update
+        "hasAnyContributions": rng.random() < 0.25,
+        "hasAnyRestrictedContributions": False,
+        "totalCommitContributions": rng.randint(0, 1000),
+        "totalPullRequestContributions": len(pull_requests),
+        "pullRequestReviewContributions": {"totalCount": rng.randint(0, 150)},
+    }
+    user = {
+        "organizations": {"nodes": [{"login": org} for org in orgs]},
+        "pullRequests": {
+            "pageInfo": {"hasNextPage": False, "endCursor": None},
+            "nodes": pull_requests,
+        },
+        "contributionsCollection": contributions,
+        "repositoriesContributedTo": {"nodes": repos, "totalCount": len(repos)},
+    }
+    for alias, days in windows:
+        fraction = min(1.0, int(days) / 365)
+        user[alias] = {
+            "totalCommitContributions": int(contributions["totalCommitContributions"] * fraction),
+            "totalPullRequestContributions": int(contributions["totalPullRequestContributions"] * fraction),
+            "pullRequestReviewContributions": {
+                "totalCount": int(contributions["pullRequestReviewContributions"]["totalCount"] * fraction)
+            },
+        }
+    return user
+
+
+class FakeGitHubServer:
+    """
+    Threaded HTTP server answering GraphQL POSTs with synthetic users.
+
+    latency: seconds to wait before answering each request.
+    error_rate: fraction of requests answered with a 502.
+    rate_limit: points per window; once spent, requests get a 403 with X-RateLimit headers.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0,
+                 rate_limit=5000, rate_limit_window=3600, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rate_limit_window = rate_limit_window
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._remaining = rate_limit
+        self._reset_at = time.time() + rate_limit_window
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/graphql"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def answer(self, body):
+        """
+        Return (status, headers, payload) for a decoded GraphQL request body.
+        """
+        with self._lock:
+            self.requests += 1
+            now = time.time()
+            if now >= self._reset_at:
+                self._remaining = self.rate_limit
+                self._reset_at = now + self.rate_limit_window
+            fail = self._random.random() < self.error_rate
+            if not fail and self._remaining > 0:
+                self._remaining -= 1
+            remaining, reset_at = self._remaining, self._reset_at
+            exhausted = not fail and remaining == 0 and self.rate_limit > 0
+
+        headers = {
+            "X-RateLimit-Limit": str(self.rate_limit),
+            "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(reset_at)),
+        }
+        if fail:
+            with self._lock:
+                self.errors += 1
+            return 502, headers, {"message": "Bad Gateway"}
+        if exhausted:
+            return 403, headers, {"message": "API rate limit exceeded"}
+
+        query = body.get("query", "")
+        variables = body.get("variables") or {}
+        data, errors = {}, []
+
+        if "search(" in query:
+            data["search"] = self._search(variables.get("query", ""))
+
+        aliases = ALIAS_PATTERN.findall(query)
+        if not aliases:
+            aliases = [("user", name) for name in SINGLE_PATTERN.findall(query)]
+        windows = WINDOW_PATTERN.findall(query)
+        for alias, variable in aliases:
+            user = synthetic_user(variables.get(variable, ""), windows=windows)
+            data[alias] = user
+            if user is None:
+                errors.append({"type": "NOT_FOUND", "path": [alias],
+                               "message": f"Could not resolve to a User with the login of '{variables.get(variable)}'."})
+
+        if "rateLimit" in query:
+            data["rateLimit"] = {
+                "limit": self.rate_limit,
+                "cost": 1,
+                "remaining": remaining,
+                "resetAt": datetime.fromtimestamp(reset_at, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            }
+
+        payload = {"data": data}
+        if errors:
+            payload["errors"] = errors
+        return 200, headers, payload
+
+    def _search(self, search_query):
+        """
+        Answer a merged pull request search with the author's synthetic pull requests merged since
+        the `merged:>=` date, in one page. Other qualifiers are ignored.
+        """
+        author = SEARCH_AUTHOR_PATTERN.search(search_query)
+        merged = SEARCH_MERGED_PATTERN.search(search_query)
+        user = synthetic_user(author.group(1)) if author else None
+        nodes = [
+            {key: pr[key] for key in ("mergedAt", "additions", "deletions")}
+            for pr in (user or {}).get("pullRequests", {}).get("nodes", [])
+            if not merged or pr["mergedAt"] >= merged.group(1)
+        ]
+        return {"issueCount": len(nodes), "pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": nodes}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if server.latency:
+                    time.sleep(server.latency)
+                status, headers, payload = server.answer(body)
+                content = json.dumps(payload).encode()
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake GitHub GraphQL server.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of latency per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 502")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Points per rate limit window")
+    args = parser.parse_args()
+
+    server = FakeGitHubServer(port=args.port, latency=args.latency, error_rate=args.error_rate,
+                              rate_limit=args.rate_limit)
+    print(f"Serving fake GitHub GraphQL API at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of per-user GraphQL payloads, keyed on
+    (username, since-window, privacy, query hash), with a TTL and LRU eviction.
+    """
+    DEFAULT_TTL = 12 * 60 * 60
+    DEFAULT_MAX_ENTRIES = 50000
+
+    def __init__(self, filepath, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES, refresh=False, clock=time.time):
+        self.filepath = filepath
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.refresh = refresh
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_responses_username ON responses (username);
+            CREATE INDEX IF NOT EXISTS idx_responses_accessed_at ON responses (accessed_at);
+        """)
+
+    @staticmethod
+    def make_key(username, since, privacy, query):
+        """
+        Only the date part of `since` is used, so runs on the same day share entries.
+        """
+        query_hash = hashlib.sha256(query.encode()).hexdigest()
+        raw = f"{username.lower()}|{since[:10]}|{privacy}|{query_hash}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, username, since, privacy, query):
+        """
+        Return the cached payload, or None when missing, expired or refreshing.
+        """
+        if self.refresh:
+            self.misses += 1
+            return None
+
+        key = self.make_key(username, since, privacy, query)
+        now = self.clock()
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT payload, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+
+            self.connection.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self.connection.commit()
+            self.hits += 1
+
+        logging.info(f"Using cached response for {username}.")
+        return json.loads(row[0])
+
+    def set(self, username, since, privacy, query, payload):
+        key = self.make_key(username, since, privacy, query)
+        now = self.clock()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, username, payload, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, username.lower(), json.dumps(payload), now, now)
+            )
+            self._evict()
+            self.connection.commit()
+
+    def invalidate(self, username=None):
+        """
+        Drop the entries for one user, or the whole cache when no username is given.
+        """
+        with self._lock:
+            if username is None:
+                self.connection.execute("DELETE FROM responses")
+            else:
+                self.connection.execute("DELETE FROM responses WHERE username = ?", (username.lower(),))
+            self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def _evict(self):
+        self.connection.execute("DELETE FROM responses WHERE created_at < ?", (self.clock() - self.ttl,))
+        count = self.connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self.connection.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
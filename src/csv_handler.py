@@ -1,13 +1,36 @@
 import pandas as pd
 from datetime import datetime
 import logging
+import math
+import os
+from developer_record import SCHEMA, DeveloperRecord
+from storage import StorageHandler, timed
 
-SCHEMA = [
-    'username', 'fullname', 'commits', 'pull_requests', 'reviews', 'repositories_contributed',
-    'lines_added', 'lines_removed', 'score', 'last_updated', 'manager'
-]
+def columns_of(df):
+    """
+    Return the SCHEMA columns followed by any extra columns in `df`, such as per-window metrics.
+    """
+    return SCHEMA + [column for column in df.columns if column not in SCHEMA]
 
-class CSVHandler:
+
+def records_frame(records):
+    """
+    Build a DataFrame from developer records one column at a time, without an intermediate
+    list of dicts. Missing values become NaN, as with pd.DataFrame(list_of_dicts).
+    """
+    if isinstance(records, pd.DataFrame):
+        return records
+    records = list(records)
+    columns = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    return pd.DataFrame(
+        {column: [record.get(column, math.nan) for record in records] for column in columns},
+        columns=list(columns)
+    )
+
+
+class CSVHandler(StorageHandler):
     def __init__(self, filepath, order_by):
         self.filepath = filepath
         self.order_by = order_by
@@ -18,20 +41,33 @@ class CSVHandler:
         except FileNotFoundError:
             logging.warning(f"File not found: {self.filepath}. Creating a new file.")
             df = pd.DataFrame(columns=SCHEMA)
-        return df.reindex(columns=SCHEMA)
+        return df.reindex(columns=columns_of(df))
 
     def save_data(self, data):
-        df = pd.DataFrame(data).reindex(columns=SCHEMA)
+        df = records_frame(data)
+        self._write(df)
+        records = DeveloperRecord.from_frame(df) if isinstance(data, pd.DataFrame) else data
+        self._update_rank_index(records, replace=True)
+
+    @timed("save_data")
+    def _write(self, df):
+        df = df.reindex(columns=columns_of(df))
         if self.order_by in df.columns:
             df = df.sort_values(by=self.order_by, na_position="last") 
-        df.to_csv(self.filepath, index=False)
 
+        # Write to a temporary file first so a crash never leaves a half-written CSV behind
+        temp_path = f"{self.filepath}.tmp"
+        df.to_csv(temp_path, index=False)
+        os.replace(temp_path, self.filepath)
+
+    @timed("append_metrics")
     def append_metrics(self, metrics):
         """
         Update the CSV file with new metrics for developers.
         """
         existing_df = self.load_data()
-        new_df = pd.DataFrame(metrics).reindex(columns=SCHEMA)
+        new_df = records_frame(metrics)
+        new_df = new_df.reindex(columns=columns_of(new_df))
 
         # Normalize types
         existing_df['username'] = existing_df['username'].astype(str)
@@ -41,13 +77,17 @@ class CSVHandler:
         merged_df = pd.concat(
             [existing_df[~existing_df['username'].isin(new_df['username'])], new_df],
             ignore_index=True
-        ).reindex(columns=SCHEMA)
+        )
+        merged_df = merged_df.reindex(columns=columns_of(merged_df))
 
         if 'last_updated' in merged_df.columns:
             merged_df['last_updated'] = merged_df['last_updated'].astype(str)
 
-        self.save_data(merged_df)
+        self._write(merged_df)
+        records = DeveloperRecord.from_frame(new_df) if isinstance(metrics, pd.DataFrame) else metrics
+        self._update_rank_index(records)
 
+    @timed("filter_by_last_updated")
     def filter_by_last_updated(self):
         """
         Return a list of developer records that need processing based on 'last_updated'.
@@ -62,7 +102,7 @@ class CSVHandler:
             logging.info(f"Skipping {username}: score is up to date.")
 
         process_df = df[df['last_updated'].isna() | (df['last_updated'] < today)]
-        return process_df.to_dict(orient='records')
+        return DeveloperRecord.from_frame(process_df)
 
     def get_developers_with_scores(self):
         """
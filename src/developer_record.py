@@ -0,0 +1,99 @@
+from collections.abc import MutableMapping
+
+SCHEMA = [
+    'username', 'fullname', 'commits', 'pull_requests', 'reviews', 'repositories_contributed',
+    'lines_added', 'lines_removed', 'score', 'last_updated', 'manager'
+]
+
+_SCHEMA_COLUMNS = frozenset(SCHEMA)
+
+
+class DeveloperRecord(MutableMapping):
+    """
+    Compact developer record used through the pipeline instead of a dict per row.
+    The SCHEMA columns live in slots; extra columns (per-window metrics, score_delta) go
+    to a small dict created on first use. It behaves like the dict records it replaces:
+    `record['score']`, `record.get(...)`, `record.update(metrics)` and `dict(record)` all work.
+    """
+    __slots__ = tuple(SCHEMA) + ('_extra',)
+
+    def __init__(self, values=(), **kwargs):
+        self.update(values, **kwargs)
+
+    @classmethod
+    def from_rows(cls, columns, rows):
+        """
+        Build one record per row tuple, with values in the order of `columns`.
+        """
+        slots = [column in _SCHEMA_COLUMNS for column in columns]
+        records = []
+        for row in rows:
+            record = cls.__new__(cls)
+            for column, slot, value in zip(columns, slots, row):
+                if slot:
+                    setattr(record, column, value)
+                else:
+                    record[column] = value
+            records.append(record)
+        return records
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Build records from a DataFrame column by column, without going through a dict per row.
+        """
+        columns = list(df.columns)
+        return cls.from_rows(columns, zip(*(df[column].tolist() for column in columns)))
+
+    def __getitem__(self, column):
+        try:
+            if column in _SCHEMA_COLUMNS:
+                return getattr(self, column)
+            return self._extra[column]
+        except (AttributeError, KeyError):
+            raise KeyError(column) from None
+
+    def __setitem__(self, column, value):
+        if column in _SCHEMA_COLUMNS:
+            setattr(self, column, value)
+            return
+        try:
+            self._extra[column] = value
+        except AttributeError:
+            self._extra = {column: value}
+
+    def __delitem__(self, column):
+        try:
+            if column in _SCHEMA_COLUMNS:
+                delattr(self, column)
+            else:
+                del self._extra[column]
+        except (AttributeError, KeyError):
+            raise KeyError(column) from None
+
+    def get(self, column, default=None):
+        if column in _SCHEMA_COLUMNS:
+            return getattr(self, column, default)
+        try:
+            return self._extra.get(column, default)
+        except AttributeError:
+            return default
+
+    def update(self, values=(), **kwargs):
+        items = values.items() if hasattr(values, 'keys') else values
+        for column, value in items:
+            self[column] = value
+        for column, value in kwargs.items():
+            self[column] = value
+
+    def __iter__(self):
+        for column in SCHEMA:
+            if hasattr(self, column):
+                yield column
+        yield from getattr(self, '_extra', ())
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"DeveloperRecord({dict(self)!r})"
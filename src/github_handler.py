@@ -1,85 +1,665 @@
 import requests
 import logging
-from datetime import datetime, timedelta
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from requests.adapters import HTTPAdapter
+from instrumentation import Instrumentation
+from query_builder import QueryPlan
+from utils import WINDOW_METRICS, window_column
+
+
+def create_session(pool_size=10):
+    """
+    Build a keep-alive session whose connection pool holds up to `pool_size` connections
+    to the API host and asks for gzip-compressed responses.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+    return session
+
+
+class TokenBudget:
+    """
+    Rate limit budget and usage accounting of a single token.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.limit = None
+        self.remaining = None
+        self.reset_at = None
+        self.cost = 1
+        self.requests = 0
+        self.points = 0
+        self.revoked = False
+
+    @property
+    def label(self):
+        return f"...{self.token[-4:]}" if self.token else "anonymous"
+
+    def available(self, now):
+        if self.revoked:
+            return False
+        return self.remaining is None or self.remaining >= self.cost or self.reset_at is None or self.reset_at <= now
+
+
+class TokenPool:
+    """
+    Hands out the token with the most remaining budget. Exhausted tokens sit out until
+    their budget resets; revoked tokens are dropped for the rest of the run.
+    """
+
+    def __init__(self, tokens=None):
+        self.budgets = [TokenBudget(token) for token in (tokens or [None])]
+        self._lock = threading.Lock()
+
+    def acquire(self, now):
+        """
+        Return the budget of the token to use next, or None once every token is revoked.
+        When every token is exhausted, the one that resets first is returned.
+        """
+        with self._lock:
+            active = [budget for budget in self.budgets if not budget.revoked]
+            if not active:
+                return None
+
+            for budget in active:
+                if budget.reset_at is not None and budget.reset_at <= now:
+                    budget.remaining, budget.reset_at = None, None
+
+            available = [budget for budget in active if budget.available(now)]
+            if not available:
+                budget = min(active, key=lambda budget: budget.reset_at)
+                budget.requests += 1
+                return budget
+
+            budget = max(available, key=lambda b: float("inf") if b.remaining is None else b.remaining)
+            if budget.remaining is not None:
+                # Reserve the points up front so concurrent workers spread across tokens
+                budget.remaining = max(0, budget.remaining - budget.cost)
+            budget.requests += 1
+            return budget
+
+    def update(self, budget, rate_limit):
+        with self._lock:
+            budget.limit = rate_limit.get("limit", budget.limit)
+            budget.remaining = rate_limit.get("remaining", budget.remaining)
+            budget.cost = max(1, rate_limit.get("cost") or 1)
+            budget.points += budget.cost
+            if rate_limit.get("resetAt"):
+                budget.reset_at = datetime.fromisoformat(rate_limit["resetAt"].replace("Z", "+00:00")).timestamp()
+
+    def exhaust(self, budget, reset_at):
+        with self._lock:
+            budget.remaining = 0
+            budget.reset_at = reset_at
+
+    def revoke(self, budget):
+        with self._lock:
+            budget.revoked = True
+
+    def has_available(self, now, excluding=None):
+        with self._lock:
+            return any(budget.available(now) for budget in self.budgets if budget is not excluding)
+
+    def has_active(self):
+        with self._lock:
+            return any(not budget.revoked for budget in self.budgets)
+
+    def usage(self):
+        """
+        Per-token accounting for the run summary. Tokens are identified by their last four characters.
+        """
+        with self._lock:
+            return [
+                {
+                    "token": budget.label,
+                    "requests": budget.requests,
+                    "points": budget.points,
+                    "remaining": budget.remaining,
+                    "status": "revoked" if budget.revoked else "active",
+                }
+                for budget in self.budgets
+            ]
+
+
+class RequestScheduler:
+    """
+    Paces GraphQL requests against GitHub's primary and secondary rate limits,
+    waits out rate-limit responses and retries transient failures with jittered
+    exponential backoff. Requests are spread over a pool of tokens, each with its
+    own primary budget.
+    """
+    RETRY_STATUSES = {500, 502, 503, 504}
+    RATE_LIMIT_STATUSES = {403, 429}
+
+    def __init__(self, max_retries=5, backoff_base=1.0, backoff_max=60.0,
+                 requests_per_minute=2000, low_budget_ratio=0.2,
+                 sleep=time.sleep, clock=time.time, tokens=None):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.low_budget_ratio = low_budget_ratio
+        self.sleep = sleep
+        self.clock = clock
+
+        self.pool = TokenPool(tokens)
+        self.cost = 1
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def remaining(self):
+        """
+        Points left across all active tokens, or None before the first response.
+        """
+        known = [budget.remaining for budget in self.pool.budgets
+                 if not budget.revoked and budget.remaining is not None]
+        return sum(known) if known else None
+
+    def use_tokens(self, tokens):
+        self.pool = TokenPool(tokens)
+
+    def execute(self, send, account=True):
+        """
+        Call `send(token)` once a request slot is available and return the decoded JSON body.
+        Raises the underlying `requests` exception once retries are exhausted.
+        Without `account`, the returned rateLimit block is not recorded (e.g. for dry runs).
+        """
+        attempt = 0
+        while True:
+            budget = self.pool.acquire(self.clock())
+            if budget is None:
+                raise requests.HTTPError("Every GitHub token in the pool was rejected.")
+            if not budget.available(self.clock()):
+                wait = budget.reset_at - self.clock() + 1
+                logging.warning(f"All tokens are out of budget. Waiting {wait:.0f}s for the reset...")
+                self.sleep(wait)
+
+            self._wait_for_slot()
+            try:
+                response = send(budget.token)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                logging.warning(f"Request failed ({e}). Retrying in {delay:.1f}s...")
+            else:
+                if response.status_code == 401:
+                    logging.error(f"Token {budget.label} was rejected. Removing it from the pool.")
+                    self.pool.revoke(budget)
+                    if self.pool.has_active():
+                        continue
+                    response.raise_for_status()
+
+                delay = self._retry_delay(response, attempt, budget)
+                if delay is None:
+                    response.raise_for_status()
+                    data = response.json()
+                    delay = self._rate_limited_delay(data, attempt, budget)
+                    if delay is None:
+                        if account:
+                            self.update_budget(data.get("data") or {}, budget)
+                        return data
+                    logging.warning(f"GraphQL rate limit hit on token {budget.label}. Retrying in {delay:.1f}s...")
+                else:
+                    logging.warning(f"HTTP {response.status_code} from GitHub. Retrying in {delay:.1f}s...")
+
+            attempt += 1
+            self.sleep(delay)
+
+    def update_budget(self, data, budget=None):
+        """
+        Record the `rateLimit { limit cost remaining resetAt }` block returned with a query.
+        """
+        rate_limit = data.get("rateLimit")
+        if not rate_limit:
+            return
+
+        self.pool.update(budget or self.pool.budgets[0], rate_limit)
+        self.cost = max(1, rate_limit.get("cost") or 1)
+
+    def _wait_for_slot(self):
+        with self._lock:
+            now = self.clock()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval(now)
+        if slot > now:
+            self.sleep(slot - now)
+
+    def _interval(self, now):
+        """
+        Minimum spacing between requests. While the primary budgets are healthy this is the
+        secondary limit; once they run low, the remaining points of every token are spread
+        until that token's reset.
+        """
+        active = [budget for budget in self.pool.budgets if not budget.revoked]
+        known = [budget for budget in active
+                 if budget.remaining is not None and budget.reset_at is not None and budget.reset_at > now]
+        if not known or len(known) < len(active):
+            return self.min_interval
+
+        if all(budget.remaining < budget.cost for budget in known):
+            return max(self.min_interval, min(budget.reset_at for budget in known) - now)
+
+        limit = sum(budget.limit or 0 for budget in known)
+        remaining = sum(budget.remaining for budget in known)
+        if limit and remaining < limit * self.low_budget_ratio:
+            requests_per_second = sum(
+                (budget.remaining / budget.cost) / (budget.reset_at - now) for budget in known
+            )
+            return max(self.min_interval, 1 / requests_per_second)
+
+        return self.min_interval
+
+    def _retry_delay(self, response, attempt, budget):
+        if attempt >= self.max_retries:
+            return None
+
+        if response.status_code in self.RATE_LIMIT_STATUSES:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after:
+                return self._parse_retry_after(retry_after)
+            if response.headers.get("X-RateLimit-Remaining") == "0":
+                reset = response.headers.get("X-RateLimit-Reset")
+                reset = float(reset) if reset else None
+                self.pool.exhaust(budget, reset)
+                if self.pool.has_available(self.clock(), excluding=budget):
+                    logging.warning(f"Token {budget.label} is out of budget. Switching tokens.")
+                    return 0.0
+                if reset is not None:
+                    return max(0.0, reset - self.clock()) + 1
+                return self._backoff(attempt)
+            return None
+
+        if response.status_code in self.RETRY_STATUSES:
+            return self._backoff(attempt)
+
+        return None
+
+    def _rate_limited_delay(self, data, attempt, budget):
+        errors = data.get("errors") or []
+        if attempt >= self.max_retries or not any(error.get("type") == "RATE_LIMITED" for error in errors):
+            return None
+
+        self.pool.exhaust(budget, budget.reset_at)
+        if self.pool.has_available(self.clock(), excluding=budget):
+            return 0.0
+        if budget.reset_at is not None and budget.reset_at > self.clock():
+            return budget.reset_at - self.clock() + 1
+        return self._backoff(attempt)
+
+    def _parse_retry_after(self, value):
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = parsedate_to_datetime(value)
+            return max(0.0, retry_at.timestamp() - datetime.now(timezone.utc).timestamp())
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(delay / 2, delay)
+
 
 class GitHubHandler:
-    GRAPHQL_QUERY = """
-    query($username: String!, $since: DateTime!, $privacy: RepositoryPrivacy) {
-      user(login: $username) {
-        organizations(first: 10) {
-          nodes {
-            login
-          }
-        }
-        pullRequests(first: 100, states: MERGED, orderBy: {field: CREATED_AT, direction: DESC}) {
-          nodes {
+    USER_FIELDS = QueryPlan().user_fields()
+
+    RATE_LIMIT_FIELDS = """
+      rateLimit {
+        limit
+        cost
+        remaining
+        resetAt
+      }"""
+
+    USER_QUERY_TEMPLATE = """
+    query($username: String!, $since: DateTime!, $privacy: RepositoryPrivacy{variables}) {{
+      user(login: $username) {{{user_fields}}}{rate_limit}
+    }}
+    """
+
+    GRAPHQL_QUERY = USER_QUERY_TEMPLATE.format(variables="", user_fields=USER_FIELDS, rate_limit=RATE_LIMIT_FIELDS)
+
+    DRY_RUN_FIELDS = """
+      rateLimit(dryRun: true) {
+        cost
+      }"""
+
+    PULL_REQUESTS_QUERY = f"""
+    query($username: String!, $after: String) {{
+      user(login: $username) {{
+        pullRequests(first: 100, after: $after, states: MERGED, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{
+          pageInfo {{
+            hasNextPage
+            endCursor
+          }}
+          nodes {{
+            id
+            mergedAt
+            updatedAt
             additions
             deletions
-          }
-        }
-        contributionsCollection(from: $since) {
-          totalCommitContributions
-          totalPullRequestContributions
-          pullRequestReviewContributions(first: 100) {
-            totalCount
-          }
-        }
-        repositoriesContributedTo(first: 100, privacy: $privacy) {
-          nodes {
-            nameWithOwner
-            owner {
-              login
-            }
-          }
-          totalCount
-        }
-      }
-    }
+          }}
+        }}
+      }}{RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    SEARCH_PULL_REQUESTS_QUERY = f"""
+    query($query: String!, $after: String) {{
+      search(type: ISSUE, query: $query, first: 100, after: $after) {{
+        issueCount
+        pageInfo {{
+          hasNextPage
+          endCursor
+        }}
+        nodes {{
+          ... on PullRequest {{
+            mergedAt
+            additions
+            deletions
+          }}
+        }}
+      }}{RATE_LIMIT_FIELDS}
+    }}
     """
 
-    def __init__(self, token, api_url):
+    # The search API stops paginating after this many results
+    SEARCH_RESULT_LIMIT = 1000
+
+    PROBE_FIELDS = """
+        contributionsCollection(from: $s{index}, to: $to) {{
+          hasAnyContributions
+          hasAnyRestrictedContributions
+        }}
+      """
+
+    DEFAULT_BATCH_SIZE = 25
+    DEFAULT_PROBE_BATCH_SIZE = 100
+    # GitHub caps a contributionsCollection at one year, so older starts cannot be probed
+    MAX_PROBE_DAYS = 365
+    DEFAULT_POOL_SIZE = 10
+    DEFAULT_TIMEOUT = (10, 60)
+
+    def __init__(self, token, api_url, batch_size=DEFAULT_BATCH_SIZE, scheduler=None,
+                 session=None, pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, cache=None, sync=None,
+                 instrumentation=None, query_plan=None, search_lines=False, archive=None):
         self.api_url = api_url
-        self.headers = {"Authorization": f"token {token}"} if token else {}
-        if not token:
+        query_plan = query_plan or QueryPlan()
+        self.windows = query_plan.windows
+        self.variable_definitions = query_plan.variable_definitions()
+        self.user_fields = query_plan.user_fields()
+        self.graphql_query = self.USER_QUERY_TEMPLATE.format(
+            variables=self.variable_definitions, user_fields=self.user_fields, rate_limit=self.RATE_LIMIT_FIELDS
+        )
+        self.instrumentation = instrumentation or Instrumentation()
+        self.cache = cache
+        self.sync = sync
+        self.search_lines = search_lines
+        self.archive = archive
+        self.batch_size = max(1, batch_size)
+        self.scheduler = scheduler or RequestScheduler()
+        self.session = session or create_session(pool_size)
+        self.timeout = timeout
+        tokens = [token] if token is None or isinstance(token, str) else list(token)
+        tokens = [token for token in tokens if token]
+        self.scheduler.use_tokens(tokens)
+        if not tokens:
             logging.warning("No GitHub token provided. API rate limits may apply.")
 
     def get_developer_metrics(self, username, days_back=365, exclude_private=False, only_organizations=False):
         since = (datetime.now() - timedelta(days=days_back)).isoformat()
-        contributions = self.fetch_contributions_graphql(username, since, exclude_private)
+        with self.instrumentation.timer("fetch_contributions_graphql"):
+            contributions = self.fetch_contributions_graphql(username, since, exclude_private)
+
+        if contributions is None:
+            return None
+        if not contributions:
+            return self._empty_metrics(username)
+
+        metrics = self._parse_metrics(username, contributions, only_organizations)
+        metrics = self._apply_search(metrics, contributions, days_back, exclude_private, only_organizations)
+        return self._apply_sync(metrics, days_back)
+
+    def get_developers_metrics(self, usernames, days_back=365, exclude_private=False, only_organizations=False):
+        """
+        Fetch metrics for many developers, packing up to `batch_size` users into each request.
+        Returns a dictionary keyed by username; developers whose fetch failed map to None.
+        """
+        since = (datetime.now() - timedelta(days=days_back)).isoformat()
+        results = {}
+
+        for start in range(0, len(usernames), self.batch_size):
+            batch = usernames[start:start + self.batch_size]
+            with self.instrumentation.timer("fetch_contributions_batch"):
+                contributions = self.fetch_contributions_batch(batch, since, exclude_private)
+
+            for username in batch:
+                user = contributions.get(username)
+                if user is None:
+                    results[username] = None
+                elif not user:
+                    results[username] = self._empty_metrics(username)
+                else:
+                    metrics = self._parse_metrics(username, user, only_organizations)
+                    metrics = self._apply_search(metrics, user, days_back, exclude_private, only_organizations)
+                    results[username] = self._apply_sync(metrics, days_back)
+
+        return results
+
+    def sync_pull_requests(self, username, since):
+        """
+        Fetch the merged pull requests updated since the developer's watermark, newest first,
+        and return their line totals over the window starting at `since` (UTC, ISO 8601).
+        Returns None if a page could not be fetched; the pages stored so far are kept.
+        """
+        watermark, cursor, pending_watermark = self.sync.get_state(username)
+        pending_watermark = pending_watermark or watermark
+        synced_since = self.sync.synced_since(username)
+        if watermark is not None and (synced_since is None or since < synced_since):
+            # The store does not reach back to `since`: page through everything again instead
+            # of stopping at the watermark, so older pull requests in the window are backfilled
+            logging.info(f"Backfilling pull requests for {username} back to {since}.")
+            watermark = None
+            synced_since = since
+        elif synced_since is None:
+            synced_since = since
+
+        while True:
+            payload = {"query": self.PULL_REQUESTS_QUERY, "variables": {"username": username, "after": cursor}}
+            try:
+                data = self.post_graphql(payload)
+            except requests.RequestException as e:
+                logging.error(f"HTTP error syncing pull requests for {username}: {e}")
+                return None
+            except ValueError:
+                logging.error(f"Invalid JSON response syncing pull requests for {username}")
+                return None
+
+            if "errors" in data:
+                logging.warning(f"GraphQL errors syncing pull requests for {username}: {data['errors']}")
+                if not all(self._is_not_found(error) for error in data["errors"]):
+                    return None
 
+            connection = ((data.get("data") or {}).get("user") or {}).get("pullRequests")
+            if connection is None:
+                break
+
+            nodes = connection["nodes"]
+            fresh = [
+                pr for pr in nodes
+                if pr["updatedAt"] >= since and (watermark is None or pr["updatedAt"] > watermark)
+            ]
+            if fresh:
+                pending_watermark = max(pending_watermark or fresh[0]["updatedAt"], fresh[0]["updatedAt"])
+
+            done = len(fresh) < len(nodes) or not connection["pageInfo"]["hasNextPage"]
+            cursor = connection["pageInfo"]["endCursor"]
+            self.sync.save_page(username, fresh, None if done else cursor, pending_watermark)
+            if done:
+                break
+
+        logging.info(f"Synced pull requests for {username} up to {pending_watermark}.")
+        self.sync.complete(username, pending_watermark, synced_since)
+        return self.sync.line_totals(username, since)
+
+    def metrics_from_payload(self, username, contributions, only_organizations=False, fetched_at=None):
+        """
+        Compute metrics from a payload archived by --record, with the windows' line counts
+        split relative to `fetched_at` (UTC, ISO 8601) instead of now.
+        """
         if not contributions:
             return self._empty_metrics(username)
+        now = datetime.strptime(fetched_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc) if fetched_at else None
+        return self._parse_metrics(username, contributions, only_organizations, now=now)
+
+    def _record(self, username, contributions, since, privacy):
+        """
+        Archive a payload fetched from the API; payloads served from the cache were archived when fetched.
+        """
+        if self.archive is not None:
+            self.archive.append(username, contributions, since, privacy, self.windows, line_source=self.line_source)
+
+    @property
+    def line_source(self):
+        """
+        Where line counts come from: the latest merged pull requests, the sync store or the search API.
+        """
+        if self.sync:
+            return "incremental"
+        if self.search_lines:
+            return "search"
+        return "pull_requests"
+
+    def search_pull_request_lines(self, username, days_back=365, exclude_private=False, organizations=None):
+        """
+        Return the line totals of the developer's pull requests merged in the last `days_back` days,
+        and in each window, reading only those pull requests through the search API.
+        `exclude_private` and `organizations` become `is:public` and `org:` search qualifiers.
+        Returns None if a page could not be fetched.
+        """
+        since = {days: self._utc_since(days) for days in (days_back, *self.windows)}
+        totals = {name: 0 for name in self._line_columns()}
+        if organizations is not None and not organizations:
+            return totals
+
+        qualifiers = [f"author:{username}", "is:pr", "is:merged", f"merged:>={min(since.values())}"]
+        if exclude_private:
+            qualifiers.append("is:public")
+        qualifiers.extend(f"org:{org}" for org in sorted(organizations or ()))
+        query, after = " ".join(qualifiers), None
+
+        while True:
+            payload = {"query": self.SEARCH_PULL_REQUESTS_QUERY, "variables": {"query": query, "after": after}}
+            try:
+                data = self.post_graphql(payload)
+            except requests.RequestException as e:
+                logging.error(f"HTTP error searching pull requests for {username}: {e}")
+                return None
+            except ValueError:
+                logging.error(f"Invalid JSON response searching pull requests for {username}")
+                return None
+
+            if "errors" in data:
+                logging.warning(f"GraphQL errors searching pull requests for {username}: {data['errors']}")
+                return None
+
+            search = (data.get("data") or {}).get("search")
+            if search is None:
+                return totals
+
+            for pr in search["nodes"]:
+                if not pr:
+                    continue
+                if pr["mergedAt"] >= since[days_back]:
+                    totals["lines_added"] += pr["additions"]
+                    totals["lines_removed"] += pr["deletions"]
+                for window in self.windows:
+                    if pr["mergedAt"] >= since[window]:
+                        totals[window_column("lines_added", window)] += pr["additions"]
+                        totals[window_column("lines_removed", window)] += pr["deletions"]
 
-        orgs = {org["login"] for org in contributions["organizations"]["nodes"]}
-        repos = contributions["repositoriesContributedTo"]["nodes"]
+            if not search["pageInfo"]["hasNextPage"]:
+                break
+            after = search["pageInfo"]["endCursor"]
 
+        if search["issueCount"] > self.SEARCH_RESULT_LIMIT:
+            logging.warning(f"{username} has {search['issueCount']} merged pull requests in the window; "
+                            f"only the first {self.SEARCH_RESULT_LIMIT} are counted.")
+        return totals
+
+    def _apply_search(self, metrics, contributions, days_back, exclude_private, only_organizations):
+        """
+        Replace the line counts with the search API totals when search aggregation is enabled.
+        """
+        if not self.search_lines or metrics is None:
+            return metrics
+
+        organizations = None
         if only_organizations:
-            logging.info(f"Filtering contributions by organizations: {orgs}")
-            repos = [repo for repo in repos if repo["owner"]["login"] in orgs]
+            organizations = {org["login"] for org in contributions["organizations"]["nodes"]}
 
-        prs = contributions["pullRequests"]["nodes"]
-        total_additions = sum(pr["additions"] for pr in prs)
-        total_deletions = sum(pr["deletions"] for pr in prs)
+        with self.instrumentation.timer("search_pull_requests"):
+            line_totals = self.search_pull_request_lines(metrics["username"], days_back, exclude_private, organizations)
+        if line_totals is None:
+            return None
 
-        return {
-            "username": username,
-            "commits": contributions["contributionsCollection"]["totalCommitContributions"],
-            "pull_requests": contributions["contributionsCollection"]["totalPullRequestContributions"],
-            "reviews": contributions["contributionsCollection"]["pullRequestReviewContributions"]["totalCount"],
-            "repositories_contributed": contributions["repositoriesContributedTo"]["totalCount"],
-            "lines_added": total_additions,
-            "lines_removed": total_deletions
-        }
+        metrics.update(line_totals)
+        return metrics
+
+    def _line_columns(self):
+        return ["lines_added", "lines_removed"] + [
+            window_column(name, window) for window in self.windows for name in ("lines_added", "lines_removed")
+        ]
+
+    def _apply_sync(self, metrics, days_back):
+        """
+        Replace the line counts with the locally accumulated totals when incremental sync is enabled.
+        """
+        if not self.sync or metrics is None:
+            return metrics
+
+        # Sync back to the earliest start, so windows longer than --days-back are covered too
+        earliest = min(self._utc_since(days) for days in (days_back, *self.windows))
+        if self.sync_pull_requests(metrics["username"], earliest) is None:
+            return None
+
+        metrics.update(self.sync.line_totals(metrics["username"], self._utc_since(days_back)))
+
+        for window in self.windows:
+            window_totals = self.sync.line_totals(metrics["username"], self._utc_since(window))
+            metrics.update({window_column(name, window): value for name, value in window_totals.items()})
+        return metrics
+
+    def _window_variables(self):
+        """
+        Return the `$since_<N>d` variables of the extra lookback windows.
+        """
+        now = datetime.now()
+        return {f"since_{window}d": (now - timedelta(days=window)).isoformat() for window in self.windows}
+
+    def _utc_since(self, days_back, now=None):
+        return ((now or datetime.now(timezone.utc)) - timedelta(days=days_back)).strftime("%Y-%m-%dT%H:%M:%SZ")
 
     def fetch_contributions_graphql(self, username, since, exclude_private):
         privacy = "PUBLIC" if exclude_private else None
-        variables = {"username": username, "since": since, "privacy": privacy}
-        payload = {"query": self.GRAPHQL_QUERY, "variables": variables}
+        if self.cache:
+            cached = self.cache.get(username, since, privacy, self.user_fields)
+            if cached is not None:
+                return cached
+
+        variables = {"username": username, "since": since, "privacy": privacy, **self._window_variables()}
+        payload = {"query": self.graphql_query, "variables": variables}
 
         try:
-            response = requests.post(self.api_url, json=payload, headers=self.headers)
-            response.raise_for_status()
-            data = response.json()
+            data = self.post_graphql(payload)
         except requests.RequestException as e:
             logging.error(f"HTTP error fetching data for {username}: {e}")
             return None
@@ -89,9 +669,261 @@ class GitHubHandler:
 
         if "errors" in data:
             logging.warning(f"GraphQL errors for {username}: {data['errors']}")
+            if not all(self._is_not_found(error) for error in data["errors"]):
+                return None
+
+        user = (data.get("data") or {}).get("user") or {}
+        if self.cache:
+            self.cache.set(username, since, privacy, self.user_fields, user)
+        self._record(username, user, since, privacy)
+        return user
+
+    def build_batch_query(self, count, dry_run=False):
+        """
+        Build a query that fetches `count` users at once, aliased as u0, u1, ...
+        With `dry_run`, GitHub only reports the query's cost without running it.
+        """
+        logins = ", ".join(f"$u{i}: String!" for i in range(count))
+        aliases = "".join(f"\n      u{i}: user(login: $u{i}) {{{self.user_fields}}}" for i in range(count))
+        rate_limit = self.DRY_RUN_FIELDS if dry_run else self.RATE_LIMIT_FIELDS
+        return f"""
+    query($since: DateTime!, $privacy: RepositoryPrivacy{self.variable_definitions}, {logins}) {{{aliases}{rate_limit}
+    }}
+    """
+
+    def build_probe_query(self, count):
+        """
+        Build a query asking, for `count` users at once, whether each has any contribution
+        between its own start date ($s0, $s1, ...) and $to.
+        """
+        variables = ", ".join(["$to: DateTime!"] + [f"$u{i}: String!, $s{i}: DateTime!" for i in range(count)])
+        aliases = "".join(
+            f"\n      u{i}: user(login: $u{i}) {{{self.PROBE_FIELDS.format(index=i)}}}" for i in range(count)
+        )
+        return f"""
+    query({variables}) {{{aliases}{self.RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    def probe_activity(self, since_by_username, batch_size=DEFAULT_PROBE_BATCH_SIZE):
+        """
+        Check which developers contributed anything since the given date (ISO 8601), in
+        batches of cheap aliased queries. Returns a dictionary keyed by username: True if
+        there is new activity, False if there is none, None if the probe failed.
+        Developers last updated more than a year ago are reported active without a probe.
+        """
+        now = datetime.now()
+        oldest = now - timedelta(days=self.MAX_PROBE_DAYS)
+        results = {}
+        usernames = []
+        for username, since in since_by_username.items():
+            if datetime.fromisoformat(since) < oldest:
+                results[username] = True
+            else:
+                usernames.append(username)
+
+        for start in range(0, len(usernames), batch_size):
+            batch = usernames[start:start + batch_size]
+            variables = {"to": now.isoformat()}
+            for i, username in enumerate(batch):
+                variables[f"u{i}"] = username
+                variables[f"s{i}"] = since_by_username[username]
+            payload = {"query": self.build_probe_query(len(batch)), "variables": variables}
+
+            try:
+                with self.instrumentation.timer("probe_activity"):
+                    data = self.post_graphql(payload)
+            except requests.RequestException as e:
+                logging.error(f"HTTP error probing activity for batch {batch}: {e}")
+                data = {}
+            except ValueError:
+                logging.error(f"Invalid JSON response probing activity for batch {batch}")
+                data = {}
+
+            for error in data.get("errors", []):
+                logging.warning(f"GraphQL errors probing activity: {error}")
+
+            users = data.get("data") or {}
+            for i, username in enumerate(batch):
+                collection = (users.get(f"u{i}") or {}).get("contributionsCollection")
+                if collection is None:
+                    results[username] = None
+                else:
+                    results[username] = collection["hasAnyContributions"] or collection["hasAnyRestrictedContributions"]
+
+        return results
+
+    def estimate_run_cost(self, usernames, days_back=365, exclude_private=False):
+        """
+        Ask GitHub for the point cost of one batched request and extrapolate it to the
+        whole run. Returns None if the dry run fails.
+        """
+        if not usernames:
+            return {"requests": 0, "cost_per_request": 0, "total_cost": 0}
+
+        batch = usernames[:self.batch_size]
+        since = (datetime.now() - timedelta(days=days_back)).isoformat()
+        variables = {
+            "since": since,
+            "privacy": "PUBLIC" if exclude_private else None,
+            **self._window_variables(),
+            **{f"u{i}": username for i, username in enumerate(batch)}
+        }
+        payload = {"query": self.build_batch_query(len(batch), dry_run=True), "variables": variables}
+
+        try:
+            data = self.post_graphql(payload, account=False)
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Could not estimate the query cost: {e}")
+            return None
+
+        cost = ((data.get("data") or {}).get("rateLimit") or {}).get("cost")
+        if cost is None:
+            logging.error(f"Could not estimate the query cost: {data.get('errors')}")
             return None
 
-        return data.get("data", {}).get("user")
+        requests_needed = -(-len(usernames) // self.batch_size)
+        return {"requests": requests_needed, "cost_per_request": cost, "total_cost": requests_needed * cost}
+
+    def fetch_contributions_batch(self, usernames, since, exclude_private):
+        """
+        Fetch contributions for several users in a single aliased request.
+        Errors are attributed to the alias in their path, so one bad login only drops that user.
+        Unknown logins map to an empty dict and failed fetches to None.
+        Users found in the cache are left out of the request.
+        """
+        privacy = "PUBLIC" if exclude_private else None
+        results = {}
+        if self.cache:
+            for username in usernames:
+                cached = self.cache.get(username, since, privacy, self.user_fields)
+                if cached is not None:
+                    results[username] = cached
+
+        missing = [username for username in usernames if username not in results]
+        if missing:
+            fetched = self._request_batch(missing, since, privacy)
+            for username, user in fetched.items():
+                if user is not None:
+                    if self.cache:
+                        self.cache.set(username, since, privacy, self.user_fields, user)
+                    self._record(username, user, since, privacy)
+            results.update(fetched)
+
+        return {username: results[username] for username in usernames}
+
+    def _request_batch(self, usernames, since, privacy):
+        aliases = {f"u{i}": username for i, username in enumerate(usernames)}
+        variables = {"since": since, "privacy": privacy, **self._window_variables(), **aliases}
+        payload = {"query": self.build_batch_query(len(usernames)), "variables": variables}
+
+        try:
+            data = self.post_graphql(payload)
+        except requests.RequestException as e:
+            logging.error(f"HTTP error fetching data for batch {usernames}: {e}")
+            return {username: None for username in usernames}
+        except ValueError:
+            logging.error(f"Invalid JSON response for batch {usernames}")
+            return {username: None for username in usernames}
+
+        users = data.get("data") or {}
+        failed = set()
+        for error in data.get("errors", []):
+            alias = (error.get("path") or [None])[0]
+            if alias in aliases:
+                logging.warning(f"GraphQL errors for {aliases[alias]}: {error}")
+                if not self._is_not_found(error):
+                    failed.add(alias)
+            else:
+                logging.warning(f"GraphQL errors for batch {usernames}: {error}")
+                failed.update(alias for alias in aliases if users.get(alias) is None)
+
+        return {
+            username: None if alias in failed else users.get(alias) or {}
+            for alias, username in aliases.items()
+        }
+
+    def post_graphql(self, payload, account=True):
+        """
+        Send one GraphQL payload through the scheduler and return the decoded response.
+        Raises `requests` exceptions, or ValueError for an invalid JSON body.
+        `account=False` keeps the response's rateLimit block out of the token budgets.
+        """
+        def send(token):
+            headers = {"Authorization": f"token {token}"} if token else {}
+            start = time.perf_counter()
+            try:
+                return self.session.post(self.api_url, json=payload, headers=headers, timeout=self.timeout)
+            finally:
+                self.instrumentation.observe("request_latency_seconds", time.perf_counter() - start)
+
+        data = self.scheduler.execute(send, account=account)
+        for name, value in (("graphql_cost", self.scheduler.cost), ("graphql_remaining", self.scheduler.remaining)):
+            if value is not None:
+                self.instrumentation.set_gauge(name, value)
+        return data
+
+    def token_usage(self):
+        return self.scheduler.pool.usage()
+
+    def connection_stats(self):
+        """
+        Return how many requests were sent and how many TCP connections were opened
+        to serve them, summed over the session's connection pools.
+        """
+        stats = {"requests": 0, "connections": 0}
+        adapters = {id(adapter): adapter for adapter in self.session.adapters.values()}
+        for adapter in adapters.values():
+            pools = getattr(getattr(adapter, "poolmanager", None), "pools", None)
+            if pools is None:
+                continue
+            for key in pools.keys():
+                pool = pools[key]
+                stats["requests"] += pool.num_requests
+                stats["connections"] += pool.num_connections
+        stats["reused"] = stats["requests"] - stats["connections"]
+        return stats
+
+    def _is_not_found(self, error):
+        return error.get("type") == "NOT_FOUND"
+
+    def _parse_metrics(self, username, contributions, only_organizations, now=None):
+        repositories_contributed = contributions["repositoriesContributedTo"]["totalCount"]
+
+        if only_organizations:
+            orgs = {org["login"] for org in contributions["organizations"]["nodes"]}
+            logging.info(f"Filtering contributions by organizations: {orgs}")
+            repos = contributions["repositoriesContributedTo"]["nodes"]
+            repositories_contributed = len([repo for repo in repos if repo["owner"]["login"] in orgs])
+
+        # Pull requests are left out of the query when lines come from incremental sync
+        prs = contributions.get("pullRequests", {}).get("nodes", [])
+        total_additions = sum(pr["additions"] for pr in prs)
+        total_deletions = sum(pr["deletions"] for pr in prs)
+
+        metrics = {
+            "username": username,
+            "commits": contributions["contributionsCollection"]["totalCommitContributions"],
+            "pull_requests": contributions["contributionsCollection"]["totalPullRequestContributions"],
+            "reviews": contributions["contributionsCollection"]["pullRequestReviewContributions"]["totalCount"],
+            "repositories_contributed": repositories_contributed,
+            "lines_added": total_additions,
+            "lines_removed": total_deletions
+        }
+
+        for window in self.windows:
+            collection = contributions[f"contributions_{window}d"]
+            since = self._utc_since(window, now)
+            window_prs = [pr for pr in prs if pr["mergedAt"] >= since]
+            metrics.update({
+                window_column("commits", window): collection["totalCommitContributions"],
+                window_column("pull_requests", window): collection["totalPullRequestContributions"],
+                window_column("reviews", window): collection["pullRequestReviewContributions"]["totalCount"],
+                window_column("lines_added", window): sum(pr["additions"] for pr in window_prs),
+                window_column("lines_removed", window): sum(pr["deletions"] for pr in window_prs)
+            })
+
+        return metrics
 
     def _empty_metrics(self, username):
         logging.info(f"No data found for {username}. Returning zeroed metrics.")
@@ -102,5 +934,6 @@ class GitHubHandler:
             "reviews": 0,
             "repositories_contributed": 0,
             "lines_added": 0,
-            "lines_removed": 0
+            "lines_removed": 0,
+            **{window_column(name, window): 0 for window in self.windows for name in WINDOW_METRICS}
         }
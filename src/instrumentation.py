@@ -0,0 +1,113 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+METRIC_PREFIX = "github_dev_stats"
+
+
+class Instrumentation:
+    """
+    Collects per-phase timings, histograms and gauges for a run, and writes them
+    out as JSON or as a Prometheus textfile.
+    """
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.timings = {}
+        self.histograms = {}
+        self.gauges = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def timer(self, phase):
+        """
+        Time the enclosed block and add it to the phase's call count and total seconds.
+        """
+        start = self.clock()
+        try:
+            yield
+        finally:
+            elapsed = self.clock() - start
+            with self._lock:
+                timing = self.timings.setdefault(phase, {"count": 0, "seconds": 0.0})
+                timing["count"] += 1
+                timing["seconds"] += elapsed
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS):
+        """
+        Record a value in the named histogram.
+        """
+        with self._lock:
+            histogram = self.histograms.setdefault(
+                name, {"buckets": {bound: 0 for bound in buckets}, "count": 0, "sum": 0.0}
+            )
+            for bound in histogram["buckets"]:
+                if value <= bound:
+                    histogram["buckets"][bound] += 1
+            histogram["count"] += 1
+            histogram["sum"] += value
+
+    def set_gauge(self, name, value):
+        with self._lock:
+            self.gauges[name] = value
+
+    def summary(self):
+        with self._lock:
+            return {
+                "timings": {phase: dict(timing) for phase, timing in self.timings.items()},
+                "histograms": {
+                    name: {
+                        "buckets": {str(bound): count for bound, count in histogram["buckets"].items()},
+                        "count": histogram["count"],
+                        "sum": histogram["sum"],
+                    }
+                    for name, histogram in self.histograms.items()
+                },
+                "gauges": dict(self.gauges),
+            }
+
+    def write(self, filepath):
+        """
+        Write the summary to `filepath`: JSON for .json files, Prometheus text format otherwise.
+        The file is replaced atomically so a textfile collector never reads a partial file.
+        """
+        if filepath.endswith(".json"):
+            content = json.dumps(self.summary(), indent=2)
+        else:
+            content = self.to_prometheus()
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{filepath}.tmp"
+        with open(temp_path, "w") as metrics_file:
+            metrics_file.write(content)
+        os.replace(temp_path, filepath)
+
+    def to_prometheus(self):
+        summary = self.summary()
+        lines = [
+            f"# TYPE {METRIC_PREFIX}_phase_seconds_total counter",
+            *(f'{METRIC_PREFIX}_phase_seconds_total{{phase="{phase}"}} {timing["seconds"]}'
+              for phase, timing in summary["timings"].items()),
+            f"# TYPE {METRIC_PREFIX}_phase_calls_total counter",
+            *(f'{METRIC_PREFIX}_phase_calls_total{{phase="{phase}"}} {timing["count"]}'
+              for phase, timing in summary["timings"].items()),
+        ]
+
+        for name, histogram in summary["histograms"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} histogram")
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{METRIC_PREFIX}_{name}_bucket{{le="{bound}"}} {count}')
+            lines.append(f'{METRIC_PREFIX}_{name}_bucket{{le="+Inf"}} {histogram["count"]}')
+            lines.append(f"{METRIC_PREFIX}_{name}_sum {histogram['sum']}")
+            lines.append(f"{METRIC_PREFIX}_{name}_count {histogram['count']}")
+
+        for name, value in summary["gauges"].items():
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name} gauge")
+            lines.append(f"{METRIC_PREFIX}_{name} {value}")
+
+        return "\n".join(lines) + "\n"
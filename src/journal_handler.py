@@ -0,0 +1,97 @@
+import json
+import logging
+import os
+import threading
+
+
+def truncate_partial_line(filepath, chunk_size=4096):
+    """
+    Cut a JSON-lines file back to its last newline, dropping a line left half-written by a
+    crash, so the next appended line starts on a line of its own.
+    """
+    with open(filepath, "rb+") as lines_file:
+        end = lines_file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            lines_file.seek(start)
+            newline = lines_file.read(position - start).rfind(b"\n")
+            if newline != -1:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            logging.warning(f"Dropping an incomplete last line from {filepath}.")
+            lines_file.truncate(position)
+
+
+class Journal:
+    """
+    Append-only JSON-lines journal of processed developer records. Every record is
+    flushed to disk as soon as it is written, so an interrupted run can be resumed
+    without fetching those developers again.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+        self._file = None
+
+    def exists(self):
+        return os.path.exists(self.filepath)
+
+    def open(self, resume=False):
+        """
+        Start appending. Unless resuming, any journal left by a previous run is discarded.
+        """
+        if self.exists() and not resume:
+            logging.warning(f"Discarding journal from a previous run: {self.filepath}. Use --resume to keep it.")
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if resume and self.exists():
+            truncate_partial_line(self.filepath)
+        self._file = open(self.filepath, "a" if resume else "w", encoding="utf-8")
+
+    def append(self, record):
+        line = json.dumps(dict(record), default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def replay(self):
+        """
+        Return the journaled records, keeping the latest one per username.
+        A truncated last line (from a crash mid-write) is ignored.
+        """
+        if not self.exists():
+            return []
+
+        records = {}
+        with open(self.filepath, encoding="utf-8") as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logging.warning(f"Ignoring incomplete journal entry in {self.filepath}.")
+                    continue
+                records[record["username"]] = record
+        return list(records.values())
+
+    def compact(self, storage):
+        """
+        Write the journaled records into the storage backend and remove the journal.
+        The journal is only removed once the storage write has completed.
+        """
+        self.close()
+        records = self.replay()
+        storage.append_metrics(records)
+        os.remove(self.filepath)
+        logging.info(f"Compacted {len(records)} journaled developers into storage.")
+        return records
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
@@ -1,18 +1,43 @@
 import logging
 import argparse
+import json
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from github_handler import GitHubHandler
-from csv_handler import CSVHandler
-from utils import calculate_productivity_score, categorize_developers
+from storage import open_storage
+from sharding import find_shards, merge_shards, select_shard, shard_path
+from refresh_policy import RefreshPolicy, parse_last_updated
+from instrumentation import Instrumentation
+from utils import CATEGORIES, calculate_productivity_score, window_column
 from datetime import datetime
 
+# The GitHub client (requests) and storage backends (pandas) are imported on the code
+# paths that use them, so --help and --report-only start without the HTTP stack.
+
 load_dotenv()
-logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - [%(threadName)s] %(message)s")
 
 
-def parse_args():
+def parse_args(argv=None):
     parser = argparse.ArgumentParser(description="Fetch GitHub developer metrics.")
+    parser.add_argument("command", nargs="?", choices=["run", "merge", "rank", "serve", "replay"], default="run",
+                        help="run: fetch and score developers (default); "
+                             "merge: combine the outputs of sharded runs into the data file; "
+                             "rank: look up ranks from the stored scores; "
+                             "serve: refresh continuously and serve scores over HTTP; "
+                             "replay: recompute metrics and scores from the responses archived by --record")
+    parser.add_argument("username", nargs="?",
+                        help="Developer whose rank, percentile and tier `rank` prints")
+    parser.add_argument("--top", type=int,
+                        help="With `rank`, print the K highest scoring developers")
+    parser.add_argument("--tier", choices=CATEGORIES,
+                        help="With `rank`, print the developers in one category")
+    parser.add_argument("--host", type=str, default="127.0.0.1",
+                        help="Address `serve` listens on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8080,
+                        help="Port `serve` listens on (default: 8080)")
+    parser.add_argument("--format", choices=["text", "ndjson"], default="text",
+                        help="Print the categories as text lists, or one JSON object per developer (default: text)")
     parser.add_argument("--days-back", type=int, default=365,
                         help="Number of days back to fetch metrics (default: 365 days)")
     parser.add_argument("--exclude-private", action="store_true", default=False,
@@ -21,14 +46,128 @@ def parse_args():
                         help="Fetch contributions only within organizations")
     parser.add_argument("--order-by", type=str,
                         help="Sorts the output by the specified column (default: score)")
-    return parser.parse_args()
+    parser.add_argument("--batch-size", type=int, default=1,
+                        help="Number of developers to fetch per GraphQL request (default: 1)")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Number of requests to keep in flight at once (default: 1)")
+    parser.add_argument("--pool-size", type=int,
+                        help="Number of keep-alive connections to the API (default: max(10, concurrency))")
+    parser.add_argument("--no-cache", action="store_true", default=False,
+                        help="Do not read or write the local response cache")
+    parser.add_argument("--refresh", action="store_true", default=False,
+                        help="Ignore cached responses, but store the fresh ones")
+    parser.add_argument("--cache-ttl", type=float, default=12,
+                        help="Hours a cached response stays valid (default: 12)")
+    parser.add_argument("--incremental", action="store_true", default=False,
+                        help="Sync only new merged pull requests and count lines over the whole window")
+    parser.add_argument("--search-lines", action="store_true", default=False,
+                        help="Sum the lines of pull requests merged within --days-back with the search API, "
+                             "instead of reading the latest 100 merged pull requests")
+    parser.add_argument("--record", action="store_true", default=False,
+                        help="Append every raw GraphQL response to a compressed archive for `replay`")
+    parser.add_argument("--as-of", type=parse_date,
+                        help="With `replay`, use the latest responses archived on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--import-csv", type=str,
+                        help="Upsert developers from a CSV file before running")
+    parser.add_argument("--export-csv", type=str,
+                        help="Write all developers to a CSV file after running")
+    parser.add_argument("--checkpoint", action="store_true", default=False,
+                        help="Journal each developer to disk as soon as it is processed")
+    parser.add_argument("--resume", action="store_true", default=False,
+                        help="Resume an interrupted --checkpoint run, skipping developers already journaled")
+    parser.add_argument("--metrics-out", type=str,
+                        help="Write run timings and request metrics to this file (.json, or Prometheus text otherwise)")
+    parser.add_argument("--budget", type=int,
+                        help="Refresh at most this many developers, most overdue first (default: no limit)")
+    parser.add_argument("--tiers", type=parse_tiers, default=dict(RefreshPolicy.DEFAULT_INTERVALS),
+                        help="Refresh intervals in days of the active, quiet and dormant tiers (default: 1,7,30)")
+    parser.add_argument("--probe", action="store_true", default=False,
+                        help="Check for activity since each developer's last update with a cheap batched query, "
+                             "and only fetch full metrics for developers with new activity")
+    parser.add_argument("--org", action="append", default=[],
+                        help="Collect members of this organization by walking its repositories once instead of "
+                             "querying each developer; can be repeated")
+    parser.add_argument("--windows", type=parse_windows, default=[],
+                        help="Comma-separated extra lookback windows in days, e.g. 30,90,365, fetched in the "
+                             "same request and stored as <metric>_<N>d and score_<N>d columns")
+    parser.add_argument("--dry-run-cost", action="store_true", default=False,
+                        help="Print the estimated rate limit point cost of the run and exit without fetching")
+    parser.add_argument("--shard-index", type=int, default=0,
+                        help="Index of this shard, from 0 to --shard-count - 1 (default: 0)")
+    parser.add_argument("--shard-count", type=int, default=1,
+                        help="Split developers across this many shards by a stable hash of their username, "
+                             "writing each shard to its own file for `merge` (default: 1)")
+    parser.add_argument("--report-only", action="store_true", default=False,
+                        help="Print the developer categories from the stored data without fetching anything")
+    args = parser.parse_args(argv)
+    if args.shard_count < 1 or not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    if args.search_lines and args.incremental:
+        parser.error("--search-lines cannot be combined with --incremental")
+    return args
+
+
+def parse_date(value):
+    """
+    Validate a YYYY-MM-DD date, keeping it as a string.
+    """
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value!r}")
+
+
+def parse_windows(value):
+    """
+    Parse a comma-separated list of lookback windows in days, dropping duplicates.
+    """
+    try:
+        windows = [int(window) for window in value.split(",") if window.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid windows: {value!r}")
+    if any(window <= 0 for window in windows):
+        raise argparse.ArgumentTypeError(f"windows must be positive: {value!r}")
+    return list(dict.fromkeys(windows))
+
+
+def parse_tiers(value):
+    """
+    Parse the active, quiet and dormant refresh intervals, in days.
+    """
+    try:
+        intervals = [int(interval) for interval in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid tiers: {value!r}")
+    if len(intervals) != 3 or any(interval <= 0 for interval in intervals):
+        raise argparse.ArgumentTypeError(f"tiers must be three positive intervals in days: {value!r}")
+    return dict(zip(["active", "quiet", "dormant"], intervals))
+
+
+def load_tokens():
+    """
+    Collect the GitHub tokens to use: GITHUB_TOKENS (comma-separated), the lines of
+    GITHUB_TOKENS_FILE, and GITHUB_TOKEN. Duplicates are dropped, order is kept.
+    """
+    tokens = [token.strip() for token in os.getenv("GITHUB_TOKENS", "").split(",")]
+
+    tokens_file = os.getenv("GITHUB_TOKENS_FILE")
+    if tokens_file:
+        with open(tokens_file) as f:
+            tokens.extend(line.strip() for line in f if not line.startswith("#"))
+
+    tokens.append(os.getenv("GITHUB_TOKEN") or "")
+    return list(dict.fromkeys(token for token in tokens if token))
 
 
 def load_config():
     return {
         "GITHUB_TOKEN": os.getenv("GITHUB_TOKEN"),
+        "GITHUB_TOKENS": load_tokens(),
         "GITHUB_API_URL": os.getenv("GITHUB_API_URL", "https://api.github.com/graphql"),
-        "DATA_FILE_PATH": os.getenv("DATA_FILE_PATH", "data/developers.csv")
+        "DATA_FILE_PATH": os.getenv("DATA_FILE_PATH", "data/developers.csv"),
+        "CACHE_FILE_PATH": os.getenv("CACHE_FILE_PATH", "data/cache.db"),
+        "SYNC_FILE_PATH": os.getenv("SYNC_FILE_PATH", "data/sync.db"),
+        "ARCHIVE_FILE_PATH": os.getenv("ARCHIVE_FILE_PATH", "data/responses.gz")
     }
 
 
@@ -42,6 +181,38 @@ def process_developer(developer, github_handler, args):
         exclude_private=args.exclude_private,
         only_organizations=args.only_organizations
     )
+    with github_handler.instrumentation.timer("scoring"):
+        return score_developer(developer, metrics, github_handler.windows)
+
+
+def process_batch(batch, github_handler, args):
+    usernames = [developer['username'] for developer in batch]
+    logging.info(f"Fetching metrics for {len(usernames)} developers: {usernames}...")
+
+    metrics_by_user = github_handler.get_developers_metrics(
+        usernames,
+        days_back=args.days_back,
+        exclude_private=args.exclude_private,
+        only_organizations=args.only_organizations
+    )
+    with github_handler.instrumentation.timer("scoring"):
+        return [
+            score_developer(developer, metrics_by_user[developer['username']], github_handler.windows)
+            for developer in batch
+        ]
+
+
+def score_developer(developer, metrics, windows=()):
+    """
+    Apply fetched metrics and a fresh score to the developer record, plus a score_<N>d
+    column for each extra lookback window.
+    Returns None when the metrics could not be fetched, so the stored row is left untouched.
+    """
+    username = developer['username']
+    if metrics is None:
+        logging.error(f"Could not fetch metrics for {username}. Keeping the previously stored values.")
+        return None
+
     logging.info(f"Metrics for {username}: {metrics}")
 
     if metrics['commits'] == 0 and (metrics['lines_added'] > 0 or metrics['lines_removed'] > 0):
@@ -61,39 +232,444 @@ def process_developer(developer, github_handler, args):
     if score == 0:
         logging.warning(f"Score for {username} is 0. Please check your permissions on their profile.")
 
+    previous_score = developer.get('score')
     developer.update(metrics)
     developer['score'] = score
+    # How much the score moved since the last refresh; volatile developers are refreshed more often
+    try:
+        developer['score_delta'] = score - int(previous_score)
+    except (TypeError, ValueError):
+        pass
+    for window in windows:
+        developer[window_column('score', window)] = calculate_productivity_score(
+            metrics[window_column('commits', window)], metrics[window_column('pull_requests', window)],
+            metrics[window_column('reviews', window)], metrics['repositories_contributed'],
+            metrics[window_column('lines_added', window)], metrics[window_column('lines_removed', window)]
+        )
     developer['last_updated'] = datetime.now().strftime('%Y-%m-%d')
 
     return developer
 
 
-def main():
-    args = parse_args()
-    config = load_config()
+def probe_developers(developers, github_handler):
+    """
+    Split developers into those with activity since their last update, who need a full fetch,
+    and idle ones, whose last_updated is bumped to today and whose metrics are kept.
+    Developers that were never updated or whose probe failed are fetched in full.
+    """
+    since_by_username = {}
+    for developer in developers:
+        last_updated = parse_last_updated(developer.get('last_updated'))
+        if last_updated:
+            since_by_username[developer['username']] = last_updated.isoformat()
+
+    activity = github_handler.probe_activity(since_by_username)
+    today = datetime.now().strftime('%Y-%m-%d')
+    active, idle = [], []
+    for developer in developers:
+        if activity.get(developer['username']) is False:
+            logging.info(f"No new activity for {developer['username']}: keeping their metrics.")
+            developer['last_updated'] = today
+            developer['score_delta'] = 0
+            idle.append(developer)
+        else:
+            active.append(developer)
+
+    logging.info(f"Activity probe: {len(active)} developers to fetch, {len(idle)} without new activity.")
+    return active, idle
+
+
+def process_developers(developers, github_handler, args, journal=None):
+    """
+    Process developers in batches of `args.batch_size`, running up to `args.concurrency`
+    batches at once. Results are returned in the same order as the input, without the
+    developers whose metrics could not be fetched. When a journal is given, each result
+    is appended to it as soon as its batch completes.
+    """
+    batch_size = max(1, args.batch_size)
+    batches = [developers[i:i + batch_size] for i in range(0, len(developers), batch_size)]
+
+    def run(batch):
+        if batch_size == 1:
+            results = [process_developer(batch[0], github_handler, args)]
+        else:
+            results = process_batch(batch, github_handler, args)
+
+        if journal:
+            for developer in results:
+                if developer is not None:
+                    journal.append(developer)
+        return results
+
+    if args.concurrency <= 1:
+        results = map(run, batches)
+        return [dev for batch in results for dev in batch if dev is not None]
+
+    with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="worker") as executor:
+        results = executor.map(run, batches)
+        return [dev for batch in results for dev in batch if dev is not None]
 
+
+def process_organizations(developers, github_handler, args, journal=None):
+    """
+    Score the developers who are members of `args.org` from a single walk of the organizations'
+    repositories. Developers outside them, or everyone if the walk failed, are fetched one
+    by one as usual.
+    """
+    from org_collector import OrganizationCollector
+
+    metrics_by_login = OrganizationCollector(github_handler).collect(
+        args.org, days_back=args.days_back, exclude_private=args.exclude_private
+    )
+    if metrics_by_login is None:
+        logging.warning("Falling back to fetching every developer individually.")
+        metrics_by_login = {}
+
+    members, others = [], []
+    for developer in developers:
+        (members if str(developer['username']).lower() in metrics_by_login else others).append(developer)
+
+    results = []
+    with github_handler.instrumentation.timer("scoring"):
+        for developer in members:
+            metrics = {**metrics_by_login[str(developer['username']).lower()], "username": developer['username']}
+            results.append(score_developer(developer, metrics, github_handler.windows))
+    if journal:
+        for developer in results:
+            journal.append(developer)
+
+    if others:
+        logging.info(f"{len(others)} developers are not members of {args.org}; fetching them individually.")
+        results.extend(process_developers(others, github_handler, args, journal=journal))
+    return results
+
+
+def build_github_handler(args, config, instrumentation=None):
+    """
+    Create the GitHub client for the run's flags, with its response cache, sync store and archive.
+    """
+    from github_handler import GitHubHandler
+    from query_builder import QueryPlan
+    from cache_handler import ResponseCache
+    from sync_handler import PullRequestSync
+    from response_archive import ResponseArchive
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(config["CACHE_FILE_PATH"], ttl=args.cache_ttl * 3600, refresh=args.refresh)
+    sync = PullRequestSync(config["SYNC_FILE_PATH"]) if args.incremental else None
+    archive = ResponseArchive(config["ARCHIVE_FILE_PATH"]) if args.record else None
+
+    return GitHubHandler(
+        config["GITHUB_TOKENS"], config["GITHUB_API_URL"],
+        batch_size=args.batch_size,
+        pool_size=args.pool_size or max(GitHubHandler.DEFAULT_POOL_SIZE, args.concurrency),
+        cache=cache,
+        sync=sync,
+        instrumentation=instrumentation,
+        # Recorded responses keep every field, so `replay` can change the flags that read them
+        query_plan=QueryPlan(
+            organizations=args.only_organizations or args.record,
+            pull_requests=args.record or not (args.incremental or args.search_lines),
+            windows=args.windows
+        ),
+        search_lines=args.search_lines,
+        archive=archive
+    )
+
+
+def excluded_requests(count, args):
+    """
+    Describe the requests of a run of `count` developers that --dry-run-cost does not price,
+    since their number depends on each developer's activity or on the organizations' size.
+    """
+    from github_handler import GitHubHandler
+
+    excluded = []
+    if args.probe:
+        probes = -(-count // GitHubHandler.DEFAULT_PROBE_BATCH_SIZE)
+        excluded.append(f"{probes} activity probe requests (--probe)")
+    if args.incremental:
+        excluded.append(f"at least {count} pull request sync requests, one page per 100 pull requests (--incremental)")
+    if args.search_lines:
+        excluded.append(f"at least {count} search requests, one page per 100 pull requests (--search-lines)")
+    if args.org:
+        excluded.append("the organization walk, about one request per active repository (--org)")
+    return excluded
+
+
+def refresh_developers(storage, args, config, instrumentation=None):
+    """
+    Fetch and score every developer that is due for an update and write them to storage.
+    """
+    from journal_handler import Journal
+
+    github_handler = build_github_handler(args, config, instrumentation)
+    cache, sync = github_handler.cache, github_handler.sync
+
+    developers = storage.filter_by_last_updated()
+
+    output_path = config['DATA_FILE_PATH']
+    if args.shard_count > 1:
+        developers = select_shard(developers, args.shard_index, args.shard_count)
+        output_path = shard_path(output_path, args.shard_index, args.shard_count)
+        logging.info(f"Shard {args.shard_index} of {args.shard_count}: {len(developers)} developers.")
+
+    developers = RefreshPolicy(intervals=args.tiers).select(developers, budget=args.budget)
+
+    if args.dry_run_cost:
+        estimate = github_handler.estimate_run_cost(
+            [developer["username"] for developer in developers], args.days_back, args.exclude_private
+        )
+        if estimate is not None:
+            print(f"Estimated cost for {len(developers)} developers: {estimate['total_cost']} points "
+                  f"({estimate['requests']} requests x {estimate['cost_per_request']} points)")
+            excluded = excluded_requests(len(developers), args)
+            if excluded:
+                print(f"Not included: {'; '.join(excluded)}")
+        if cache is not None:
+            cache.close()
+        if sync is not None:
+            sync.close()
+        if github_handler.archive is not None:
+            github_handler.archive.close()
+        return
+
+    journal = None
+    if args.checkpoint or args.resume:
+        journal = Journal(f"{output_path}.journal")
+        if args.resume:
+            journaled = {developer['username'] for developer in journal.replay()}
+            logging.info(f"Resuming: {len(journaled)} developers already journaled.")
+            developers = [developer for developer in developers if developer['username'] not in journaled]
+        journal.open(resume=args.resume)
+
+    idle_developers = []
+    if args.probe:
+        developers, idle_developers = probe_developers(developers, github_handler)
+        if journal:
+            for developer in idle_developers:
+                journal.append(developer)
+        github_handler.instrumentation.set_gauge("developers_idle", len(idle_developers))
+
+    if args.org:
+        updated_developers = process_organizations(developers, github_handler, args, journal=journal)
+    else:
+        updated_developers = process_developers(developers, github_handler, args, journal=journal)
+
+    stats = github_handler.connection_stats()
     logging.info(
-        f"Starting the script with days_back={args.days_back}, order_by={args.order_by}, "
-        f"exclude_private={args.exclude_private}, only_organizations={args.only_organizations}..."
+        f"HTTP connections: {stats['connections']} opened for {stats['requests']} requests "
+        f"({stats['reused']} reused)."
+    )
+    for index, usage in enumerate(github_handler.token_usage()):
+        logging.info(
+            f"Token {usage['token']}: {usage['requests']} requests, {usage['points']} points, "
+            f"{usage['remaining']} remaining ({usage['status']})."
+        )
+        for key in ("requests", "points", "remaining"):
+            if usage[key] is not None:
+                github_handler.instrumentation.set_gauge(f"token_{index}_{key}", usage[key])
+    github_handler.instrumentation.set_gauge("developers_processed", len(updated_developers))
+    github_handler.instrumentation.set_gauge("http_connections_opened", stats['connections'])
+    github_handler.instrumentation.set_gauge("http_connections_reused", stats['reused'])
+    if cache:
+        logging.info(f"Response cache: {cache.hits} hits, {cache.misses} misses.")
+        github_handler.instrumentation.set_gauge("cache_hits", cache.hits)
+        github_handler.instrumentation.set_gauge("cache_misses", cache.misses)
+        cache.close()
+    if sync:
+        sync.close()
+    if github_handler.archive:
+        github_handler.archive.close()
+
+    # A shard writes its developers to its own file; `merge` folds them into the data file
+    output = storage if output_path == config['DATA_FILE_PATH'] else open_storage(
+        output_path, args.order_by, instrumentation=instrumentation
+    )
+    if journal:
+        journal.compact(output)
+    else:
+        output.append_metrics(updated_developers + idle_developers)
+    if output is not storage:
+        output.close()
+    logging.info(f"Finished updating {output_path}.")
+
+
+def serve(storage, args, config, instrumentation=None):
+    """
+    Keep refreshing developers through the day and answer score lookups over HTTP until interrupted.
+    """
+    from server import ScoreServer
+
+    github_handler = build_github_handler(args, config, instrumentation)
+    server = ScoreServer(
+        storage,
+        lambda developers: process_developers(developers, github_handler, args),
+        batch_size=args.batch_size,
+        intervals=args.tiers,
+        host=args.host,
+        port=args.port
     )
+    logging.info(f"Serving {len(server.developers)} developers at {server.url}/developers/<username>.")
+    server.start()
+    try:
+        server.wait()
+    except KeyboardInterrupt:
+        logging.info("Stopping.")
+    finally:
+        server.stop()
+        if github_handler.cache:
+            github_handler.cache.close()
+        if github_handler.sync:
+            github_handler.sync.close()
+        if github_handler.archive:
+            github_handler.archive.close()
 
-    github_handler = GitHubHandler(config["GITHUB_TOKEN"], config["GITHUB_API_URL"])
-    csv_handler = CSVHandler(config["DATA_FILE_PATH"], args.order_by)
 
-    developers = csv_handler.filter_by_last_updated()
-    updated_developers = [process_developer(dev, github_handler, args) for dev in developers]
+def replay_archive(storage, args, config):
+    """
+    Recompute the metrics and scores of the stored developers from their latest archived
+    responses (up to --as-of), without calling the API. Replayed developers keep the fetch
+    date of their response as last_updated. Returns the number of developers replayed.
+    """
+    from developer_record import DeveloperRecord
+    from github_handler import GitHubHandler
+    from query_builder import QueryPlan
+    from response_archive import ResponseArchive
 
-    csv_handler.append_metrics(updated_developers)
-    logging.info("Finished updating the CSV file.")
+    archive = ResponseArchive(config["ARCHIVE_FILE_PATH"])
+    if not archive.exists():
+        logging.error(f"No archived responses at {archive.filepath}. Record some with --record first.")
+        return 0
 
-    developers = csv_handler.get_developers_with_scores()
-    categories = categorize_developers(developers)
+    github_handler = GitHubHandler(config["GITHUB_TOKENS"], config["GITHUB_API_URL"],
+                                   query_plan=QueryPlan(windows=args.windows))
+    developers = {str(developer['username']).lower(): developer
+                  for developer in DeveloperRecord.from_frame(storage.load_data())}
+    latest = archive.latest(as_of=args.as_of)
+
+    entries = []
+    for key in developers.keys() & latest.keys():
+        missing_windows = set(args.windows) - set(latest[key]["windows"])
+        if missing_windows:
+            logging.warning(f"Archived response for {latest[key]['username']} has no {sorted(missing_windows)} "
+                            f"day windows. Skipping.")
+        else:
+            entries.append(latest[key])
+    logging.info(f"Replaying {len(entries)} of {len(developers)} developers from {archive.filepath}.")
+    other_sources = sum(1 for entry in entries if entry.get("line_source", "pull_requests") != "pull_requests")
+    if other_sources:
+        logging.warning(f"{other_sources} responses were recorded by runs counting lines with --incremental or "
+                        f"--search-lines. Replay sums the latest 100 merged pull requests in each response instead, "
+                        f"so their lines and scores will differ from the recorded run.")
+
+    replayed = []
+    with github_handler.instrumentation.timer("replay"):
+        for entry, payload in archive.read(entries):
+            developer = developers[entry["username"].lower()]
+            metrics = github_handler.metrics_from_payload(
+                developer['username'], payload, args.only_organizations, fetched_at=entry["fetched_at"]
+            )
+            developer = score_developer(developer, metrics, args.windows)
+            developer['last_updated'] = entry["fetched_at"][:10]
+            replayed.append(developer)
+
+    storage.append_metrics(replayed)
+    return len(replayed)
+
+
+def print_categories(storage, output_format="text"):
+    """
+    Print the developer categories from the rank index, which is already sorted by score.
+    """
+    if output_format == "ndjson":
+        print_entries(storage.rank_index.entries())
+        return
 
     print("\nDeveloper Categories:")
-    print("Top (10%):", categories['top'])
-    print("Above Average (40%):", categories['above_average'])
-    print("Below Average (30%):", categories['below_average'])
-    print("Bottom (20%):", categories['bottom'])
+    for label, category in zip(["Top (10%):", "Above Average (40%):", "Below Average (30%):", "Bottom (20%):"],
+                               CATEGORIES):
+        print(label, [entry['fullname'] for entry in storage.rank_index.tier(category)])
+
+
+def print_entries(entries):
+    """
+    Stream rank index entries as NDJSON, one developer per line.
+    """
+    for entry in entries:
+        print(json.dumps(entry))
+
+
+def print_rank(rank_index, args):
+    """
+    Answer the `rank` command: one developer, the top K, one tier, or everyone.
+    """
+    if args.username:
+        entry = rank_index.rank(args.username)
+        if entry is None:
+            logging.error(f"{args.username} has no score in {rank_index.filepath}.")
+            raise SystemExit(1)
+        print_entries([entry])
+    elif args.top:
+        print_entries(rank_index.top(args.top))
+    elif args.tier:
+        print_entries(rank_index.tier(args.tier))
+    else:
+        print_entries(rank_index.entries())
+
+
+def main():
+    args = parse_args()
+    config = load_config()
+
+    instrumentation = Instrumentation()
+    storage = open_storage(config["DATA_FILE_PATH"], args.order_by, instrumentation=instrumentation, rank_index=True)
+    if args.command == "rank":
+        print_rank(storage.rank_index, args)
+        return
+
+    if args.import_csv:
+        storage.import_csv(args.import_csv)
+
+    if args.command == "serve":
+        serve(storage, args, config, instrumentation=instrumentation)
+        return
+
+    sharded_run = args.command == "run" and not args.report_only and args.shard_count > 1
+    dry_run = args.command == "run" and not args.report_only and args.dry_run_cost
+    if args.command == "merge":
+        paths = find_shards(config["DATA_FILE_PATH"])
+        if args.shard_count > 1 and len(paths) != args.shard_count:
+            logging.warning(f"Found {len(paths)} of {args.shard_count} shard outputs: {paths}")
+        merged = merge_shards(storage, paths, args.order_by)
+        logging.info(f"Merged {merged} developers from {len(paths)} shards into {config['DATA_FILE_PATH']}.")
+    elif args.command == "replay":
+        with instrumentation.timer("run"):
+            replayed = replay_archive(storage, args, config)
+        logging.info(f"Replayed {replayed} developers into {config['DATA_FILE_PATH']}.")
+    elif not args.report_only:
+        logging.info(
+            f"Starting the script with days_back={args.days_back}, order_by={args.order_by}, "
+            f"exclude_private={args.exclude_private}, only_organizations={args.only_organizations}, "
+            f"batch_size={args.batch_size}, concurrency={args.concurrency}, windows={args.windows}..."
+        )
+        with instrumentation.timer("run"):
+            refresh_developers(storage, args, config, instrumentation=instrumentation)
+
+    # A dry run only prints its estimate, but still writes --metrics-out
+    if not dry_run:
+        if args.export_csv:
+            storage.export_csv(args.export_csv)
+
+        if sharded_run:
+            logging.info("Categories are printed by `merge` once every shard has finished.")
+        else:
+            print_categories(storage, args.format)
+
+    if args.metrics_out:
+        instrumentation.write(args.metrics_out)
+        logging.info(f"Wrote run metrics to {args.metrics_out}.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,217 @@
+import logging
+import requests
+from datetime import datetime, timedelta, timezone
+from github_handler import GitHubHandler
+from utils import WINDOW_METRICS, window_column
+
+PAGE_INFO = """
+        pageInfo {
+          hasNextPage
+          endCursor
+        }"""
+
+
+class OrganizationCollector:
+    """
+    Collects metrics for every member of a few organizations by walking their repositories
+    once, merged pull requests with their reviews and default branch commits, and adding the
+    activity up per author. Requests scale with the number of active repositories and their
+    activity instead of with the number of developers.
+
+    Only activity in the organizations' repositories is counted, and commits only on their
+    default branches. The walk goes back to the earliest of `days_back` and the handler's
+    windows; the base metrics only count activity since the `days_back` start. Requests go
+    through the GitHubHandler's scheduler and session.
+    """
+
+    MEMBERS_QUERY = f"""
+    query($org: String!, $after: String) {{
+      organization(login: $org) {{
+        membersWithRole(first: 100, after: $after) {{{PAGE_INFO}
+          nodes {{
+            login
+          }}
+        }}
+      }}{GitHubHandler.RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    REPOSITORIES_QUERY = f"""
+    query($org: String!, $after: String, $privacy: RepositoryPrivacy) {{
+      organization(login: $org) {{
+        repositories(first: 100, after: $after, privacy: $privacy, orderBy: {{field: PUSHED_AT, direction: DESC}}) {{{PAGE_INFO}
+          nodes {{
+            name
+            pushedAt
+          }}
+        }}
+      }}{GitHubHandler.RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    PULL_REQUESTS_QUERY = f"""
+    query($owner: String!, $name: String!, $after: String) {{
+      repository(owner: $owner, name: $name) {{
+        pullRequests(first: 50, after: $after, states: MERGED, orderBy: {{field: UPDATED_AT, direction: DESC}}) {{{PAGE_INFO}
+          nodes {{
+            mergedAt
+            updatedAt
+            additions
+            deletions
+            author {{
+              login
+            }}
+            reviews(first: 50) {{
+              nodes {{
+                submittedAt
+                author {{
+                  login
+                }}
+              }}
+            }}
+          }}
+        }}
+      }}{GitHubHandler.RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    COMMITS_QUERY = f"""
+    query($owner: String!, $name: String!, $since: GitTimestamp!, $after: String) {{
+      repository(owner: $owner, name: $name) {{
+        defaultBranchRef {{
+          target {{
+            ... on Commit {{
+              history(first: 100, after: $after, since: $since) {{{PAGE_INFO}
+                nodes {{
+                  committedDate
+                  author {{
+                    user {{
+                      login
+                    }}
+                  }}
+                }}
+              }}
+            }}
+          }}
+        }}
+      }}{GitHubHandler.RATE_LIMIT_FIELDS}
+    }}
+    """
+
+    def __init__(self, github_handler):
+        self.github = github_handler
+
+    def collect(self, organizations, days_back=365, exclude_private=False):
+        """
+        Return the metrics of every member of `organizations`, keyed by lowercased login,
+        in the same format as GitHubHandler.get_developer_metrics (including the handler's
+        windows). Returns None if any page could not be fetched.
+        """
+        now = datetime.now(timezone.utc)
+        self._since = self._format(now - timedelta(days=days_back))
+        self._window_since = {window: self._format(now - timedelta(days=window)) for window in self.github.windows}
+        since = min([self._since, *self._window_since.values()])
+        self._totals = {}
+        members = set()
+
+        try:
+            with self.github.instrumentation.timer("collect_organizations"):
+                for org in organizations:
+                    org_members = {node["login"].lower() for node in self._paginate(
+                        self.MEMBERS_QUERY, {"org": org}, ["organization", "membersWithRole"]
+                    )}
+                    logging.info(f"Collecting activity of {len(org_members)} members of {org}...")
+                    members.update(org_members)
+
+                    for repository in self._active_repositories(org, since, exclude_private):
+                        self._collect_pull_requests(org, repository, since)
+                        self._collect_commits(org, repository, since)
+        except (requests.RequestException, ValueError) as e:
+            logging.error(f"Could not collect activity for {organizations}: {e}")
+            return None
+
+        return {login: self._metrics(login) for login in members}
+
+    def _active_repositories(self, org, since, exclude_private):
+        variables = {"org": org, "privacy": "PUBLIC" if exclude_private else None}
+        for repository in self._paginate(self.REPOSITORIES_QUERY, variables, ["organization", "repositories"]):
+            # Repositories come most recently pushed first, so the rest saw no pushes in the window
+            if not repository["pushedAt"] or repository["pushedAt"] < since:
+                return
+            yield repository["name"]
+
+    def _collect_pull_requests(self, org, repository, since):
+        variables = {"owner": org, "name": repository}
+        for pr in self._paginate(self.PULL_REQUESTS_QUERY, variables, ["repository", "pullRequests"]):
+            # Newest updates come first; a pull request last updated before the window was merged before it too
+            if pr["updatedAt"] < since:
+                return
+
+            if pr["mergedAt"] >= since:
+                self._add(self._login(pr["author"]), pr["mergedAt"], repository,
+                          pull_requests=1, lines_added=pr["additions"], lines_removed=pr["deletions"])
+
+            reviewers = {}
+            for review in pr["reviews"]["nodes"]:
+                login = self._login(review["author"])
+                if login and review["submittedAt"] and review["submittedAt"] >= since:
+                    reviewers[login] = min(review["submittedAt"], reviewers.get(login, review["submittedAt"]))
+            for login, submitted_at in reviewers.items():
+                self._add(login, submitted_at, repository, contributed=False, reviews=1)
+
+    def _collect_commits(self, org, repository, since):
+        variables = {"owner": org, "name": repository, "since": since}
+        path = ["repository", "defaultBranchRef", "target", "history"]
+        for commit in self._paginate(self.COMMITS_QUERY, variables, path):
+            self._add(self._login((commit["author"] or {}).get("user")), commit["committedDate"], repository, commits=1)
+
+    def _add(self, login, when, repository, contributed=True, **counts):
+        if not login:
+            return
+        author = self._totals.setdefault(login.lower(), {"repositories": set()})
+        if when >= self._since:
+            if contributed:
+                author["repositories"].add(repository)
+            for name, value in counts.items():
+                author[name] = author.get(name, 0) + value
+        for name, value in counts.items():
+            for window, window_since in self._window_since.items():
+                if when >= window_since:
+                    column = window_column(name, window)
+                    author[column] = author.get(column, 0) + value
+
+    def _metrics(self, login):
+        author = self._totals.get(login, {"repositories": set()})
+        metrics = {"username": login, "repositories_contributed": len(author["repositories"])}
+        for name in WINDOW_METRICS:
+            metrics[name] = author.get(name, 0)
+            for window in self._window_since:
+                metrics[window_column(name, window)] = author.get(window_column(name, window), 0)
+        return metrics
+
+    def _paginate(self, query, variables, path):
+        """
+        Yield the nodes of the connection found at `path`, fetching pages as they are consumed.
+        """
+        after = None
+        while True:
+            data = self.github.post_graphql({"query": query, "variables": {**variables, "after": after}})
+            if data.get("errors"):
+                raise ValueError(f"GraphQL errors: {data['errors']}")
+
+            connection = data.get("data")
+            for key in path:
+                connection = (connection or {}).get(key)
+            if connection is None:
+                return
+
+            yield from connection["nodes"]
+            if not connection["pageInfo"]["hasNextPage"]:
+                return
+            after = connection["pageInfo"]["endCursor"]
+
+    def _login(self, actor):
+        return (actor or {}).get("login")
+
+    def _format(self, moment):
+        return moment.strftime("%Y-%m-%dT%H:%M:%SZ")
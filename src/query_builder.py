@@ -0,0 +1,76 @@
+class QueryPlan:
+    """
+    Describes which user fields a run needs, so the GraphQL query only asks for them.
+
+    organizations: organization logins and repository owners, used by --only-organizations.
+    pull_requests: merged pull request sizes, not needed when lines come from incremental sync.
+    page_size: number of pull request and repository nodes to request.
+    windows: extra lookback windows in days, each fetched as an aliased contributionsCollection
+        (`contributions_30d`) over `$since_30d`, so one request covers every window.
+
+    The defaults request everything, matching GitHubHandler.GRAPHQL_QUERY.
+    """
+
+    def __init__(self, organizations=True, pull_requests=True, page_size=100, windows=()):
+        self.organizations = organizations
+        self.pull_requests = pull_requests
+        self.page_size = page_size
+        self.windows = tuple(windows)
+
+    def variable_definitions(self):
+        """
+        Return the declarations of the window start variables, to append to the query's own.
+        """
+        return "".join(f", $since_{window}d: DateTime!" for window in self.windows)
+
+    def user_fields(self):
+        fields = []
+
+        if self.organizations:
+            fields.append("""
+        organizations(first: 10) {
+          nodes {
+            login
+          }
+        }""")
+
+        if self.pull_requests:
+            # Lines are split by window on the merge date, so it is only needed with windows
+            merged_at = "\n            mergedAt" if self.windows else ""
+            fields.append(f"""
+        pullRequests(first: {self.page_size}, states: MERGED, orderBy: {{field: CREATED_AT, direction: DESC}}) {{
+          nodes {{{merged_at}
+            additions
+            deletions
+          }}
+        }}""")
+
+        for alias, since in [("", "$since")] + [(f"contributions_{window}d: ", f"$since_{window}d")
+                                                for window in self.windows]:
+            fields.append(f"""
+        {alias}contributionsCollection(from: {since}) {{
+          totalCommitContributions
+          totalPullRequestContributions
+          pullRequestReviewContributions(first: 1) {{
+            totalCount
+          }}
+        }}""")
+
+        if self.organizations:
+            fields.append(f"""
+        repositoriesContributedTo(first: {self.page_size}, privacy: $privacy) {{
+          nodes {{
+            owner {{
+              login
+            }}
+          }}
+          totalCount
+        }}""")
+        else:
+            # Only the count is scored, so a single node is enough to read totalCount
+            fields.append("""
+        repositoriesContributedTo(first: 1, privacy: $privacy) {
+          totalCount
+        }""")
+
+        return "".join(fields) + "\n    "
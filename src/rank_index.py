@@ -0,0 +1,158 @@
+import bisect
+import json
+import math
+import os
+from utils import CATEGORIES, tier_bounds
+
+
+class RankIndex:
+    """
+    Persistent index of developer scores, kept sorted by descending score (ties by username).
+    Rank, percentile and tier lookups for one developer are binary searches, and the index
+    is updated in place as scores are written instead of re-sorting the whole roster.
+
+    The index is a JSON file next to the data file. It records the data file's modification
+    time, so an index that missed a write (e.g. the file was edited by hand) is detected.
+    """
+
+    def __init__(self, filepath, source_path):
+        self.filepath = filepath
+        self.source_path = source_path
+        self._keys = []       # (-score, username), ascending
+        self._negated = []    # -score, parallel to _keys, for searches by score alone
+        self._developers = {}  # username -> (-score, fullname)
+        self._source_mtime = None
+        if os.path.exists(filepath):
+            self._load()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def is_current(self):
+        return os.path.exists(self.filepath) and self._source_mtime == self._mtime()
+
+    def rebuild(self, records, save=True):
+        """
+        Replace the index with the scores of `records`. With `save=False` the index is only
+        rebuilt in memory; the next update() or save() writes it out.
+        """
+        self._developers = {}
+        for record in records:
+            score = self._score(record.get('score'))
+            if score is not None:
+                self._developers[str(record['username'])] = (-score, self._fullname(record.get('fullname')))
+        self._keys = sorted((negated, username) for username, (negated, _) in self._developers.items())
+        self._negated = [key[0] for key in self._keys]
+        if save:
+            self.save()
+
+    def update(self, records):
+        """
+        Move each record to its new score; records without a score are dropped from the index.
+        Each move is a binary search plus a list insertion.
+        """
+        for record in records:
+            username = str(record['username'])
+            previous = self._remove(username)
+            score = self._score(record.get('score'))
+            if score is not None:
+                fullname = self._fullname(record.get('fullname')) or (previous and previous[1])
+                position = bisect.bisect_left(self._keys, (-score, username))
+                self._keys.insert(position, (-score, username))
+                self._negated.insert(position, -score)
+                self._developers[username] = (-score, fullname)
+        self.save()
+
+    def rank(self, username):
+        """
+        Return the developer's score, rank (1 = highest, ties share a rank), percentile
+        (percentage of developers scoring lower) and tier, or None if they are not indexed.
+        """
+        username = str(username)
+        if username not in self._developers:
+            return None
+        position = bisect.bisect_left(self._keys, (self._developers[username][0], username))
+        return self._entry(position)
+
+    def top(self, count):
+        """
+        Yield the `count` highest scoring developers, best first.
+        """
+        for position in range(min(count, len(self._keys))):
+            yield self._entry(position)
+
+    def tier(self, category):
+        """
+        Yield the developers of one category, best first, using the same split as categorize_developers.
+        """
+        index = CATEGORIES.index(category)
+        bounds = [0] + tier_bounds(len(self._keys)) + [len(self._keys)]
+        for position in range(min(bounds[index], len(self._keys)), min(bounds[index + 1], len(self._keys))):
+            yield self._entry(position)
+
+    def entries(self):
+        for position in range(len(self._keys)):
+            yield self._entry(position)
+
+    def save(self):
+        self._source_mtime = self._mtime()
+        content = {
+            "source_mtime": self._source_mtime,
+            "entries": [[-negated, username, self._developers[username][1]] for negated, username in self._keys],
+        }
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.filepath}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as index_file:
+            json.dump(content, index_file)
+        os.replace(temp_path, self.filepath)
+
+    def _load(self):
+        with open(self.filepath, encoding="utf-8") as index_file:
+            content = json.load(index_file)
+        self._source_mtime = content["source_mtime"]
+        self._keys = [(-score, username) for score, username, _ in content["entries"]]
+        self._negated = [key[0] for key in self._keys]
+        self._developers = {username: (-score, fullname) for score, username, fullname in content["entries"]}
+
+    def _entry(self, position):
+        negated, username = self._keys[position]
+        total = len(self._keys)
+        higher = bisect.bisect_left(self._negated, negated)
+        lower = total - bisect.bisect_right(self._negated, negated)
+        return {
+            "username": username,
+            "fullname": self._developers[username][1],
+            "score": -negated,
+            "rank": higher + 1,
+            "percentile": round(100 * lower / total, 1),
+            "tier": CATEGORIES[bisect.bisect_right(tier_bounds(total), position)],
+        }
+
+    def _remove(self, username):
+        if username not in self._developers:
+            return None
+        previous = self._developers.pop(username)
+        position = bisect.bisect_left(self._keys, (previous[0], username))
+        del self._keys[position]
+        del self._negated[position]
+        return previous
+
+    def _mtime(self):
+        try:
+            return os.stat(self.source_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _score(self, value):
+        try:
+            score = float(value)
+        except (TypeError, ValueError):
+            return None
+        if math.isnan(score):
+            return None
+        return int(score) if score.is_integer() else score
+
+    def _fullname(self, value):
+        return value if isinstance(value, str) else None
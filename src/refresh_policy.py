@@ -0,0 +1,89 @@
+import heapq
+import logging
+import math
+from datetime import datetime
+
+TIERS = ["active", "quiet", "dormant"]
+
+
+def parse_last_updated(value):
+    """
+    Return the date part of a stored last_updated value, or None if it is missing or invalid.
+    """
+    try:
+        return datetime.strptime(str(value)[:10], '%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if math.isnan(value) else value
+
+
+class RefreshPolicy:
+    """
+    Decides which developers are due for a refresh, and in what order.
+
+    Developers are placed in a tier by their stored metrics: active when they made at least
+    `active_threshold` commits, pull requests and reviews in the window or their score moved by
+    at least `volatile_delta` on the last refresh, quiet when they made any, dormant otherwise.
+    A developer is due once their last update is as old as their tier's interval (in days).
+    Due developers are served from a priority queue, most overdue relative to their interval
+    first; developers that were never updated come before everyone else.
+    """
+    DEFAULT_INTERVALS = {"active": 1, "quiet": 7, "dormant": 30}
+
+    def __init__(self, intervals=None, active_threshold=50, volatile_delta=5, today=None):
+        self.intervals = {**self.DEFAULT_INTERVALS, **(intervals or {})}
+        self.active_threshold = active_threshold
+        self.volatile_delta = volatile_delta
+        self.today = today or datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    def tier(self, developer):
+        activity = sum(_number(developer.get(metric)) for metric in ('commits', 'pull_requests', 'reviews'))
+        if activity >= self.active_threshold or abs(_number(developer.get('score_delta'))) >= self.volatile_delta:
+            return "active"
+        if activity > 0:
+            return "quiet"
+        return "dormant"
+
+    def priority(self, developer):
+        """
+        Return how overdue the developer is (age over interval, at least 1 when due),
+        or None if they are not due yet.
+        """
+        last_updated = parse_last_updated(developer.get('last_updated'))
+        if last_updated is None:
+            return math.inf
+
+        age = (self.today - last_updated).days
+        ratio = age / self.intervals[self.tier(developer)]
+        return ratio if ratio >= 1 else None
+
+    def select(self, developers, budget=None):
+        """
+        Return the due developers, most overdue first, capped at `budget` when given.
+        """
+        queue = []
+        for index, developer in enumerate(developers):
+            priority = self.priority(developer)
+            if priority is not None:
+                queue.append((-priority, index, developer))
+        heapq.heapify(queue)
+
+        count = len(queue) if budget is None else min(budget, len(queue))
+        selected = [heapq.heappop(queue)[2] for _ in range(count)]
+
+        tiers = {tier: 0 for tier in TIERS}
+        for developer in selected:
+            tiers[self.tier(developer)] += 1
+        logging.info(
+            f"Refresh policy: {len(selected)} of {len(developers)} developers selected "
+            f"({', '.join(f'{count} {tier}' for tier, count in tiers.items())}); "
+            f"{len(developers) - len(queue) - len(selected)} not due, {len(queue)} deferred by the budget."
+        )
+        return selected
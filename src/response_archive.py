@@ -0,0 +1,112 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from journal_handler import truncate_partial_line
+
+
+class ResponseArchive:
+    """
+    Append-only archive of raw per-developer GraphQL payloads, recorded with --record so
+    metrics and scores can be recomputed later without calling the API.
+
+    Each payload is appended to the data file as its own gzip member, so the file as a whole
+    is a valid gzip stream (`zcat` reads it). A JSON-lines index next to it, <filepath>.index,
+    records the username, fetch time, query window, line source and byte range of every
+    payload, so one payload can be read without decompressing the others. A payload that made
+    it to the data file but not to the index (a crash between the two writes) is never read,
+    and a half-written index line is dropped before the next run appends to the index.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.index_path = f"{filepath}.index"
+        self._lock = threading.Lock()
+        self._data_file = None
+        self._index_file = None
+
+    def exists(self):
+        return os.path.exists(self.index_path)
+
+    def append(self, username, payload, since, privacy, windows=(), fetched_at=None, line_source="pull_requests"):
+        """
+        Archive one developer's payload, as returned by fetch_contributions_graphql.
+        `line_source` is where the recording run took line counts from (GitHubHandler.line_source).
+        """
+        blob = gzip.compress(json.dumps(payload).encode())
+        entry = {
+            "username": username,
+            "fetched_at": fetched_at or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "since": since,
+            "privacy": privacy,
+            "windows": list(windows),
+            "line_source": line_source,
+        }
+        with self._lock:
+            if self._data_file is None:
+                self._open()
+            entry["offset"] = self._data_file.seek(0, os.SEEK_END)
+            entry["length"] = len(blob)
+            self._data_file.write(blob)
+            self._data_file.flush()
+            self._index_file.write(json.dumps(entry) + "\n")
+            self._index_file.flush()
+
+    def entries(self):
+        """
+        Return the index entries in the order they were archived.
+        A truncated last line (from a crash mid-write) is ignored.
+        """
+        if not self.exists():
+            return []
+
+        entries = []
+        with open(self.index_path, encoding="utf-8") as index_file:
+            for line in index_file:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    logging.warning(f"Ignoring incomplete archive index entry in {self.index_path}.")
+        return entries
+
+    def latest(self, as_of=None):
+        """
+        Return the most recent entry per lowercased username, only counting payloads
+        fetched on or before the `as_of` date (YYYY-MM-DD) when given.
+        """
+        latest = {}
+        for entry in self.entries():
+            if as_of and entry["fetched_at"][:10] > as_of:
+                continue
+            key = entry["username"].lower()
+            if key not in latest or entry["fetched_at"] >= latest[key]["fetched_at"]:
+                latest[key] = entry
+        return latest
+
+    def read(self, entries):
+        """
+        Yield `(entry, payload)` for the given index entries, reading the data file
+        front to back so a full replay is one sequential pass.
+        """
+        with open(self.filepath, "rb") as data_file:
+            for entry in sorted(entries, key=lambda entry: entry["offset"]):
+                data_file.seek(entry["offset"])
+                yield entry, json.loads(gzip.decompress(data_file.read(entry["length"])))
+
+    def close(self):
+        with self._lock:
+            for archive_file in (self._data_file, self._index_file):
+                if archive_file:
+                    archive_file.close()
+            self._data_file = self._index_file = None
+
+    def _open(self):
+        directory = os.path.dirname(self.filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.exists():
+            truncate_partial_line(self.index_path)
+        self._data_file = open(self.filepath, "ab")
+        self._index_file = open(self.index_path, "a", encoding="utf-8")
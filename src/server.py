@@ -0,0 +1,166 @@
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+from developer_record import DeveloperRecord
+from refresh_policy import RefreshPolicy
+
+
+def _json_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+
+class ScoreServer:
+    """
+    Long-running mode: keeps the roster and the rank index in memory, trickles refreshes
+    through `refresh` spread evenly over the rest of the day, and answers JSON lookups
+    over HTTP from memory.
+
+    refresh: callable taking a list of developer records and returning the refreshed ones
+        (developers whose fetch failed are left out, and retried after `retry_after` seconds).
+    batch_size: developers refreshed per cycle.
+    intervals: refresh intervals of the RefreshPolicy tiers.
+    """
+    MAX_SLEEP = 3600
+
+    def __init__(self, storage, refresh, batch_size=1, intervals=None, host="127.0.0.1", port=8080,
+                 retry_after=3600, clock=time.time):
+        self.storage = storage
+        self.refresh = refresh
+        self.batch_size = max(1, batch_size)
+        self.intervals = intervals
+        self.retry_after = retry_after
+        self.clock = clock
+        self.developers = {
+            str(record['username']): record for record in DeveloperRecord.from_frame(storage.load_data())
+        }
+        self._attempted = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._refresh_thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def lookup(self, username):
+        """
+        Return a developer's stored metrics plus their rank, percentile and tier, or None.
+        """
+        with self._lock:
+            record = self.developers.get(username)
+            if record is None:
+                return None
+            result = {column: _json_value(value) for column, value in record.items()}
+            ranking = self.storage.rank_index.rank(username) if self.storage.rank_index else None
+        if ranking:
+            result.update({key: ranking[key] for key in ("rank", "percentile", "tier")})
+        return result
+
+    def refresh_once(self):
+        """
+        Refresh the most overdue batch of developers and write it to storage.
+        Returns how many developers are still due afterwards.
+        """
+        now = self.clock()
+        with self._lock:
+            candidates = [
+                developer for username, developer in self.developers.items()
+                if now - self._attempted.get(username, -math.inf) >= self.retry_after
+            ]
+        due = RefreshPolicy(intervals=self.intervals).select(candidates)
+
+        # Work on copies so lookups never see a half-updated record
+        batch = [DeveloperRecord(developer) for developer in due[:self.batch_size]]
+        if not batch:
+            return 0
+        for developer in batch:
+            self._attempted[str(developer['username'])] = now
+
+        updated = self.refresh(batch)
+        with self._lock:
+            self.storage.append_metrics(updated)
+            for developer in updated:
+                self.developers[str(developer['username'])] = developer
+        return len(due) - len(batch)
+
+    def next_delay(self, remaining):
+        """
+        Seconds to wait before the next cycle, so the remaining due batches are spread
+        evenly over what is left of the day.
+        """
+        now = datetime.fromtimestamp(self.clock())
+        midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        until_midnight = (midnight - now).total_seconds()
+        if remaining <= 0:
+            return min(until_midnight, self.MAX_SLEEP)
+        return until_midnight / math.ceil(remaining / self.batch_size)
+
+    def start(self):
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="refresh", daemon=True)
+        self._refresh_thread.start()
+        threading.Thread(target=self._server.serve_forever, name="http", daemon=True).start()
+        return self
+
+    def wait(self):
+        self._stopped.wait()
+
+    def stop(self):
+        self._stopped.set()
+        self._server.shutdown()
+        self._server.server_close()
+        if self._refresh_thread:
+            self._refresh_thread.join()
+
+    def _refresh_loop(self):
+        while not self._stopped.is_set():
+            try:
+                remaining = self.refresh_once()
+            except Exception:
+                logging.exception("Refresh cycle failed.")
+                remaining = 0
+            delay = self.next_delay(remaining)
+            logging.info(f"{remaining} developers still due today; next refresh in {delay:.0f}s.")
+            self._stopped.wait(delay)
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0].rstrip("/")
+                if path == "/health":
+                    self._send(200, {"status": "ok", "developers": len(server.developers)})
+                elif path.startswith("/developers/"):
+                    username = unquote(path[len("/developers/"):])
+                    result = server.lookup(username)
+                    if result is None:
+                        self._send(404, {"error": f"Unknown developer: {username}"})
+                    else:
+                        self._send(200, result)
+                else:
+                    self._send(404, {"error": f"Unknown path: {path}"})
+
+            def _send(self, status, payload):
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                logging.debug(f"{self.address_string()} {format % args}")
+
+        return Handler
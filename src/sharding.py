@@ -0,0 +1,62 @@
+import glob
+import logging
+import os
+import re
+import zlib
+from developer_record import DeveloperRecord
+from storage import open_storage
+
+SHARD_PATTERN = re.compile(r"\.shard-(\d+)-of-(\d+)$")
+
+
+def shard_of(username, shard_count):
+    """
+    Return the shard a developer belongs to. Unlike hash(), CRC32 gives the same answer
+    on every machine and every run, so independent jobs agree on the split.
+    """
+    return zlib.crc32(str(username).lower().encode("utf-8")) % shard_count
+
+
+def select_shard(developers, shard_index, shard_count):
+    return [developer for developer in developers if shard_of(developer['username'], shard_count) == shard_index]
+
+
+def shard_path(filepath, shard_index, shard_count):
+    """
+    Path of a shard's partial output next to the data file, e.g. data/developers.shard-0-of-4.csv.
+    """
+    stem, extension = os.path.splitext(filepath)
+    return f"{stem}.shard-{shard_index}-of-{shard_count}{extension}"
+
+
+def find_shards(filepath):
+    """
+    Return the shard outputs written next to the data file, ordered by shard index.
+    """
+    stem, extension = os.path.splitext(filepath)
+    paths = glob.glob(f"{glob.escape(stem)}.shard-*-of-*{extension}")
+    shards = []
+    for path in paths:
+        match = SHARD_PATTERN.search(os.path.splitext(path)[0])
+        if match:
+            shards.append((int(match.group(2)), int(match.group(1)), path))
+    return [path for _, _, path in sorted(shards)]
+
+
+def merge_shards(storage, paths, order_by=None):
+    """
+    Upsert the developers of every shard output into `storage`, with the same semantics as
+    append_metrics, then remove the shard files so a later merge cannot replay stale rows.
+    Returns the number of developers merged.
+    """
+    merged = 0
+    for path in paths:
+        shard = open_storage(path, order_by)
+        records = DeveloperRecord.from_frame(shard.load_data())
+        shard.close()
+
+        storage.append_metrics(records)
+        os.remove(path)
+        merged += len(records)
+        logging.info(f"Merged {len(records)} developers from {path}.")
+    return merged
@@ -0,0 +1,143 @@
+import pandas as pd
+from datetime import datetime
+import logging
+import os
+import sqlite3
+from developer_record import SCHEMA, DeveloperRecord
+from storage import StorageHandler, timed
+
+COLUMN_TYPES = {
+    'username': 'TEXT PRIMARY KEY',
+    'fullname': 'TEXT',
+    'commits': 'INTEGER',
+    'pull_requests': 'INTEGER',
+    'reviews': 'INTEGER',
+    'repositories_contributed': 'INTEGER',
+    'lines_added': 'INTEGER',
+    'lines_removed': 'INTEGER',
+    'score': 'INTEGER',
+    'last_updated': 'TEXT',
+    'manager': 'TEXT'
+}
+
+
+class SQLiteHandler(StorageHandler):
+    """
+    Stores developers in an SQLite table indexed on username and last_updated,
+    so updates are per-row upserts instead of whole-file rewrites. Columns outside
+    SCHEMA, such as the per-window metrics, are added to the table when first written.
+    """
+
+    def __init__(self, filepath, order_by):
+        self.filepath = filepath
+        self.order_by = order_by
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        columns = ", ".join(f"{column} {COLUMN_TYPES[column]}" for column in SCHEMA)
+        self.connection.executescript(f"""
+            CREATE TABLE IF NOT EXISTS developers ({columns});
+            CREATE INDEX IF NOT EXISTS idx_developers_last_updated ON developers (last_updated);
+        """)
+        self.columns = [row[1] for row in self.connection.execute("PRAGMA table_info(developers)")]
+
+    def load_data(self):
+        df = pd.read_sql_query(f"SELECT * FROM developers{self._order_clause()}", self.connection)
+        return df.reindex(columns=self.columns)
+
+    @timed("save_data")
+    def save_data(self, data):
+        if isinstance(data, pd.DataFrame):
+            data = DeveloperRecord.from_frame(data)
+        with self.connection:
+            self.connection.execute("DELETE FROM developers")
+            self._upsert(data)
+        self._update_rank_index(data, replace=True)
+
+    @timed("append_metrics")
+    def append_metrics(self, metrics):
+        """
+        Insert or replace the given developers, one upsert per row.
+        """
+        if isinstance(metrics, pd.DataFrame):
+            metrics = DeveloperRecord.from_frame(metrics)
+        with self.connection:
+            self._upsert(metrics)
+        self._update_rank_index(metrics)
+
+    @timed("filter_by_last_updated")
+    def filter_by_last_updated(self):
+        """
+        Return a list of developer records that need processing based on 'last_updated'.
+        """
+        today = datetime.now().strftime('%Y-%m-%d')
+        skipped = self.connection.execute(
+            "SELECT COUNT(*) FROM developers WHERE last_updated >= ?", (today,)
+        ).fetchone()[0]
+        if skipped:
+            logging.info(f"Skipping {skipped} developers: scores are up to date.")
+
+        cursor = self.connection.execute(
+            "SELECT * FROM developers WHERE last_updated IS NULL OR last_updated < ?", (today,)
+        )
+        return self._records(cursor)
+
+    def get_developers_with_scores(self):
+        """
+        Return all developers with their scores as a list of dictionaries.
+        """
+        cursor = self.connection.execute(f"SELECT fullname, score FROM developers{self._order_clause()}")
+        return self._records(cursor)
+
+    def close(self):
+        self.connection.close()
+
+    def _upsert(self, records):
+        self._add_columns(records)
+
+        columns = ", ".join(self._quote(column) for column in self.columns)
+        placeholders = ", ".join("?" for _ in self.columns)
+        updates = ", ".join(
+            f"{self._quote(column)} = excluded.{self._quote(column)}" for column in self.columns if column != 'username'
+        )
+        self.connection.executemany(
+            f"INSERT INTO developers ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT(username) DO UPDATE SET {updates}",
+            (self._row(record) for record in records)
+        )
+
+    def _add_columns(self, records):
+        new_columns = {}
+        for record in records:
+            new_columns.update((column, None) for column in record if column not in self.columns)
+        for column in new_columns:
+            self.connection.execute(f"ALTER TABLE developers ADD COLUMN {self._quote(column)}")
+            self.columns.append(column)
+
+    def _quote(self, column):
+        return '"' + str(column).replace('"', '""') + '"'
+
+    def _row(self, record):
+        row = [self._to_sql(record.get(column)) for column in self.columns]
+        row[0] = str(row[0])
+        return row
+
+    def _to_sql(self, value):
+        if value is None or (not isinstance(value, str) and pd.isna(value)):
+            return None
+        if isinstance(value, pd.Timestamp):
+            return value.strftime('%Y-%m-%d')
+        if hasattr(value, 'item'):
+            return value.item()
+        return value
+
+    def _order_clause(self):
+        if self.order_by in self.columns:
+            return f" ORDER BY {self._quote(self.order_by)} IS NULL, {self._quote(self.order_by)}"
+        return ""
+
+    def _records(self, cursor):
+        columns = [description[0] for description in cursor.description]
+        return DeveloperRecord.from_rows(columns, cursor)
@@ -0,0 +1,128 @@
+import functools
+import logging
+import os
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+def timed(phase):
+    """
+    Decorator timing a storage method under `phase` when the handler is instrumented.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self._timer(phase):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class StorageHandler(ABC):
+    """
+    Interface implemented by the developer data backends. Records are mappings (dicts or
+    `DeveloperRecord`s) keyed by the columns in `developer_record.SCHEMA`; extra columns,
+    such as the per-window metrics, are stored alongside them.
+    """
+    instrumentation = None
+    rank_index = None
+
+    @abstractmethod
+    def load_data(self):
+        """
+        Return all stored developers as a DataFrame with the SCHEMA columns, then any extra ones.
+        """
+
+    @abstractmethod
+    def save_data(self, data):
+        """
+        Replace the stored developers with `data`.
+        """
+
+    @abstractmethod
+    def append_metrics(self, metrics):
+        """
+        Insert or replace the given developer records, keyed on username.
+        """
+
+    @abstractmethod
+    def filter_by_last_updated(self):
+        """
+        Return the developer records that were not updated today.
+        """
+
+    @abstractmethod
+    def get_developers_with_scores(self):
+        """
+        Return the fullname and score of every developer.
+        """
+
+    def import_csv(self, csv_path):
+        """
+        Upsert every developer from a CSV file in the CSVHandler format.
+        """
+        from csv_handler import CSVHandler
+        from developer_record import DeveloperRecord
+        df = CSVHandler(csv_path, None).load_data()
+        self.append_metrics(DeveloperRecord.from_frame(df))
+        logging.info(f"Imported {len(df)} developers from {csv_path}.")
+
+    def export_csv(self, csv_path):
+        """
+        Write every developer to a CSV file in the CSVHandler format.
+        """
+        from csv_handler import CSVHandler
+        CSVHandler(csv_path, self.order_by).save_data(self.load_data())
+        logging.info(f"Exported developers to {csv_path}.")
+
+    def close(self):
+        """
+        Release any resources held by the backend.
+        """
+
+    def attach_rank_index(self, rank_index):
+        """
+        Keep `rank_index` up to date with every score this handler writes, rebuilding it
+        first if it is missing or out of date. The rebuild stays in memory, so read-only
+        commands never write the index; it is saved with the next write to the data file.
+        """
+        self.rank_index = rank_index
+        if not rank_index.is_current():
+            logging.info(f"Rebuilding the rank index {rank_index.filepath}.")
+            from developer_record import DeveloperRecord
+            records = DeveloperRecord.from_frame(self.load_data()) if os.path.exists(self.filepath) else []
+            with self._timer("rank_index"):
+                rank_index.rebuild(records, save=False)
+
+    def _update_rank_index(self, records, replace=False):
+        if self.rank_index is None:
+            return
+        with self._timer("rank_index"):
+            if replace:
+                self.rank_index.rebuild(records)
+            else:
+                self.rank_index.update(records)
+
+    def _timer(self, phase):
+        return self.instrumentation.timer(phase) if self.instrumentation else nullcontext()
+
+
+def open_storage(filepath, order_by, instrumentation=None, rank_index=False):
+    """
+    Pick the backend from the file extension: SQLite for .db/.sqlite files, CSV otherwise.
+    With `rank_index`, scores are also kept in a sorted index at <filepath>.rank.json.
+    """
+    if filepath.lower().endswith(SQLITE_EXTENSIONS):
+        from sqlite_handler import SQLiteHandler
+        storage = SQLiteHandler(filepath, order_by)
+    else:
+        from csv_handler import CSVHandler
+        storage = CSVHandler(filepath, order_by)
+
+    storage.instrumentation = instrumentation
+    if rank_index:
+        from rank_index import RankIndex
+        storage.attach_rank_index(RankIndex(f"{filepath}.rank.json", filepath))
+    return storage
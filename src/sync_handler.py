@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import threading
+
+
+class PullRequestSync:
+    """
+    Local store of merged pull requests per developer, along with the sync state
+    (watermark and end cursor) needed to fetch only what changed since the last run.
+
+    The watermark is the newest `updatedAt` seen by the last complete pass, and `synced_since`
+    the start of the window that pass covered, so a later run asking for a longer window knows
+    to backfill. While a pass is in progress, its end cursor and running watermark are saved
+    after every page so an interrupted pass resumes where it stopped.
+    """
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(filepath, check_same_thread=False)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sync_state (
+                username TEXT PRIMARY KEY,
+                watermark TEXT,
+                cursor TEXT,
+                pending_watermark TEXT,
+                synced_since TEXT
+            );
+            CREATE TABLE IF NOT EXISTS pull_requests (
+                id TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                merged_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                additions INTEGER NOT NULL,
+                deletions INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_pull_requests_username_merged_at
+                ON pull_requests (username, merged_at);
+        """)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(sync_state)")]
+        if "synced_since" not in columns:
+            # Stores created before the column existed; their developers are backfilled once
+            self.connection.execute("ALTER TABLE sync_state ADD COLUMN synced_since TEXT")
+
+    def get_state(self, username):
+        """
+        Return (watermark, cursor, pending_watermark) for the developer, all None before the first sync.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT watermark, cursor, pending_watermark FROM sync_state WHERE username = ?",
+                (username.lower(),)
+            ).fetchone()
+        return row or (None, None, None)
+
+    def synced_since(self, username):
+        """
+        Return the start of the window the last complete pass covered, or None if unknown.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT synced_since FROM sync_state WHERE username = ?", (username.lower(),)
+            ).fetchone()
+        return row[0] if row else None
+
+    def save_page(self, username, pull_requests, cursor, pending_watermark):
+        """
+        Store a page of pull requests and the cursor to resume from.
+        """
+        rows = [
+            (pr["id"], username.lower(), pr["mergedAt"], pr["updatedAt"], pr["additions"], pr["deletions"])
+            for pr in pull_requests
+        ]
+        with self._lock:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO pull_requests (id, username, merged_at, updated_at, additions, deletions) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.connection.execute(
+                "INSERT INTO sync_state (username, cursor, pending_watermark) VALUES (?, ?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET cursor = excluded.cursor, "
+                "pending_watermark = excluded.pending_watermark",
+                (username.lower(), cursor, pending_watermark)
+            )
+            self.connection.commit()
+
+    def complete(self, username, watermark, synced_since=None):
+        """
+        Mark the current pass as complete, advancing the watermark and recording the
+        start of the window the store now covers.
+        """
+        with self._lock:
+            self.connection.execute(
+                "INSERT INTO sync_state (username, watermark, synced_since) VALUES (?, ?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET watermark = excluded.watermark, "
+                "synced_since = excluded.synced_since, cursor = NULL, pending_watermark = NULL",
+                (username.lower(), watermark, synced_since)
+            )
+            self.connection.commit()
+
+    def line_totals(self, username, since):
+        """
+        Sum additions and deletions over the pull requests merged on or after `since`.
+        """
+        with self._lock:
+            added, removed = self.connection.execute(
+                "SELECT COALESCE(SUM(additions), 0), COALESCE(SUM(deletions), 0) "
+                "FROM pull_requests WHERE username = ? AND merged_at >= ?",
+                (username.lower(), since)
+            ).fetchone()
+        return {"lines_added": added, "lines_removed": removed}
+
+    def close(self):
+        self.connection.close()
@@ -1,28 +1,136 @@
+# NumPy is imported inside the vectorized functions so importing this module stays cheap.
+
+WEIGHTS = {
+    'commits': 0.3,
+    'pull_requests': 0.3,
+    'reviews': 0.15,
+    'lines_added': 0.07,
+    'lines_removed': 0.8,
+    'repositories_contributed': 0.1,
+}
+
+CATEGORIES = ['top', 'above_average', 'below_average', 'bottom']
+
+# Metrics fetched per lookback window. GitHub only reports repositories contributed to
+# over all time, so window scores reuse the overall count.
+WINDOW_METRICS = ['commits', 'pull_requests', 'reviews', 'lines_added', 'lines_removed']
+
+
+def window_column(name, window):
+    """
+    Name of the column holding `name` over the last `window` days, e.g. commits_30d.
+    """
+    return f"{name}_{window}d"
+
+
 def calculate_productivity_score(commits, pull_requests, reviews, repositories_contributed,
                                  lines_added, lines_removed,
                                  max_commits=700, max_pull_requests=100, max_reviews=100, 
                                  max_repositories_contributed=30, max_lines_changed=250000):
-    weights = {
-        'commits': 0.3,
-        'pull_requests': 0.3,
-        'reviews': 0.15,
-        'lines_added': 0.07,
-        'lines_removed': 0.8,
-        'repositories_contributed': 0.1,
-    }
-
     # Normalize each component and clamp it between 0 and 1
     normalized_score = (
-        min(commits / max_commits, 1.0) * weights['commits'] +
-        min(pull_requests / max_pull_requests, 1.0) * weights['pull_requests'] +
-        min(reviews / max_reviews, 1.0) * weights['reviews'] +
-        min(repositories_contributed / max_repositories_contributed, 1.0) * weights['repositories_contributed'] +
-        min(lines_added / max_lines_changed, 1.0) * weights['lines_added'] +
-        min(lines_removed / max_lines_changed, 1.0) * weights['lines_removed']
+        min(commits / max_commits, 1.0) * WEIGHTS['commits'] +
+        min(pull_requests / max_pull_requests, 1.0) * WEIGHTS['pull_requests'] +
+        min(reviews / max_reviews, 1.0) * WEIGHTS['reviews'] +
+        min(repositories_contributed / max_repositories_contributed, 1.0) * WEIGHTS['repositories_contributed'] +
+        min(lines_added / max_lines_changed, 1.0) * WEIGHTS['lines_added'] +
+        min(lines_removed / max_lines_changed, 1.0) * WEIGHTS['lines_removed']
     )
 
     return round(min(normalized_score, 1.0) * 100)
 
+def calculate_productivity_scores(metrics,
+                                  max_commits=700, max_pull_requests=100, max_reviews=100,
+                                  max_repositories_contributed=30, max_lines_changed=250000):
+    """
+    Vectorized version of calculate_productivity_score. `metrics` is a DataFrame (or a dict
+    of arrays) with the metric columns; returns an integer array with one score per row.
+    The operations run in the same order as the scalar version, so the scores are identical.
+    """
+    import numpy as np
+
+    def component(column, maximum):
+        values = np.asarray(metrics[column], dtype=np.float64)
+        return np.minimum(values / maximum, 1.0) * WEIGHTS[column]
+
+    normalized_score = (
+        component('commits', max_commits) +
+        component('pull_requests', max_pull_requests) +
+        component('reviews', max_reviews) +
+        component('repositories_contributed', max_repositories_contributed) +
+        component('lines_added', max_lines_changed) +
+        component('lines_removed', max_lines_changed)
+    )
+
+    return np.rint(np.minimum(normalized_score, 1.0) * 100).astype(np.int64)
+
+def tier_bounds(total):
+    """
+    Return the end positions of the top, above average and below average categories in a
+    roster of `total` developers sorted by descending score; the rest are bottom.
+    """
+    top_count = max(1, round(total * 0.1))
+    above_count = round(total * 0.4)
+    below_count = round(total * 0.3)
+    return [top_count, top_count + above_count, top_count + above_count + below_count]
+
+def assign_tiers(scores):
+    """
+    Return the category index (0 = top ... 3 = bottom) of each score, using the same
+    percentile split and tie order as categorize_developers. Tier boundaries are found
+    with a partial partition in O(n) instead of a full sort.
+    """
+    import numpy as np
+
+    scores = np.asarray(scores, dtype=np.float64)
+    total = len(scores)
+    tiers = np.full(total, len(CATEGORIES) - 1, dtype=np.int8)
+    if total == 0:
+        return tiers
+
+    bounds = tier_bounds(total)
+
+    negated = -scores
+    kth = sorted({bound - 1 for bound in bounds if 0 < bound < total})
+    partitioned = np.partition(negated, kth) if kth else negated
+
+    for tier in reversed(range(len(bounds))):
+        bound = bounds[tier]
+        if bound >= total:
+            tiers[:] = tier
+            continue
+
+        # Everything scoring above the boundary value is in, ties are taken in input order
+        threshold = partitioned[bound - 1]
+        above = negated < threshold
+        ties = negated == threshold
+        ties &= np.cumsum(ties) <= bound - np.count_nonzero(above)
+        tiers[above | ties] = tier
+
+    return tiers
+
+def categorize_developers_batch(fullnames, scores):
+    """
+    Vectorized version of categorize_developers taking parallel arrays of names and scores.
+    Returns the same dictionary, with names ordered by descending score within each category.
+    """
+    import numpy as np
+
+    scores = np.asarray(scores, dtype=np.float64)
+    if len(scores) == 0:
+        return {}
+
+    names = np.asarray(fullnames, dtype=object)
+    tiers = assign_tiers(scores)
+
+    categories = {}
+    for tier, category in enumerate(CATEGORIES):
+        members = np.flatnonzero(tiers == tier)
+        members = members[np.argsort(-scores[members], kind='stable')]
+        categories[category] = names[members].tolist()
+
+    return categories
+
 def categorize_developers(developers):
     """
     Categorize developers based on score percentiles:
@@ -0,0 +1,61 @@
+import pytest
+from cache_handler import ResponseCache
+
+QUERY = "user { login }"
+SINCE = "2025-01-01T10:00:00"
+
+@pytest.fixture
+def clock():
+    return {"now": 1000.0}
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ResponseCache(str(tmp_path / "cache.db"), ttl=60, max_entries=2, clock=lambda: clock["now"])
+    yield cache
+    cache.close()
+
+def test_get_returns_stored_payload(cache):
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    assert cache.get("user1", "2025-01-01T18:30:00", None, QUERY) == {"login": "user1"}
+    assert cache.hits == 1
+
+def test_key_includes_privacy_and_query(cache):
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    assert cache.get("user1", SINCE, "PUBLIC", QUERY) is None
+    assert cache.get("user1", SINCE, None, "user { name }") is None
+    assert cache.get("user1", "2024-01-01T10:00:00", None, QUERY) is None
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    clock["now"] += 61
+    assert cache.get("user1", SINCE, None, QUERY) is None
+
+def test_least_recently_used_entries_are_evicted(cache, clock):
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    clock["now"] += 1
+    cache.set("user2", SINCE, None, QUERY, {"login": "user2"})
+    clock["now"] += 1
+    cache.get("user1", SINCE, None, QUERY)
+    clock["now"] += 1
+    cache.set("user3", SINCE, None, QUERY, {"login": "user3"})
+
+    assert cache.get("user1", SINCE, None, QUERY) is not None
+    assert cache.get("user2", SINCE, None, QUERY) is None
+    assert cache.get("user3", SINCE, None, QUERY) is not None
+
+def test_refresh_ignores_existing_entries(tmp_path):
+    filepath = str(tmp_path / "cache.db")
+    cache = ResponseCache(filepath)
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    cache.close()
+
+    refreshing = ResponseCache(filepath, refresh=True)
+    assert refreshing.get("user1", SINCE, None, QUERY) is None
+    refreshing.close()
+
+def test_invalidate_single_user(cache):
+    cache.set("user1", SINCE, None, QUERY, {"login": "user1"})
+    cache.set("user2", SINCE, None, QUERY, {"login": "user2"})
+    cache.invalidate("user1")
+    assert cache.get("user1", SINCE, None, QUERY) is None
+    assert cache.get("user2", SINCE, None, QUERY) == {"login": "user2"}
@@ -130,4 +130,43 @@ def test_csv_handler_order_by(csv_handler, test_data):
     handler.save_data(test_data)
     df = pd.read_csv(handler.filepath)
     scores = df['score'].tolist()
-    assert scores == [0, 20, 95], "Data should be sorted by score in ascending order"
\ No newline at end of file
+    assert scores == [0, 20, 95], "Data should be sorted by score in ascending order"
+
+def test_save_data_replaces_file_atomically(csv_handler, test_data):
+    csv_handler.save_data(test_data)
+    assert os.path.exists(csv_handler.filepath)
+    assert not os.path.exists(f"{csv_handler.filepath}.tmp")
+
+def test_append_metrics_keeps_window_columns(csv_handler, test_data):
+    csv_handler.save_data(test_data)
+    csv_handler.append_metrics([{"username": "user1", "fullname": "User One", "score": 30, "score_30d": 12}])
+
+    df = csv_handler.load_data()
+    assert list(df.columns)[-1] == "score_30d"
+    assert df[df['username'] == "user1"].iloc[0]['score_30d'] == 12
+
+def test_append_metrics_updates_rank_index(tmp_path, test_data):
+    from storage import open_storage
+    filepath = str(tmp_path / "developers.csv")
+    handler = open_storage(filepath, None, rank_index=True)
+    handler.save_data(test_data)
+
+    handler.append_metrics([{"username": "user1", "fullname": "User One", "score": 99}])
+
+    assert handler.rank_index.rank("user1")["rank"] == 1
+    assert handler.rank_index.is_current()
+
+def test_rank_index_is_not_written_by_reads(tmp_path, test_data):
+    from storage import open_storage
+    filepath = str(tmp_path / "developers.csv")
+
+    handler = open_storage(filepath, None, rank_index=True)
+    assert not (tmp_path / "developers.csv.rank.json").exists()
+
+    handler.save_data(test_data)
+    assert (tmp_path / "developers.csv.rank.json").exists()
+
+    (tmp_path / "developers.csv.rank.json").unlink()
+    reopened = open_storage(filepath, None, rank_index=True)
+    assert reopened.rank_index.rank("user1") is not None
+    assert not (tmp_path / "developers.csv.rank.json").exists()
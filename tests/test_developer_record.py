@@ -0,0 +1,48 @@
+import json
+import math
+import pandas as pd
+import pytest
+from csv_handler import records_frame
+from developer_record import SCHEMA, DeveloperRecord
+
+def test_record_behaves_like_a_dict():
+    record = DeveloperRecord({"username": "user1", "score": 20})
+    record.update({"commits": 3, "commits_30d": 1})
+    record["score_delta"] = 4
+
+    assert record["username"] == "user1"
+    assert record.get("fullname") is None
+    assert "fullname" not in record
+    assert list(record) == ["username", "commits", "score", "commits_30d", "score_delta"]
+    assert record == {"username": "user1", "commits": 3, "score": 20, "commits_30d": 1, "score_delta": 4}
+    assert json.loads(json.dumps(dict(record))) == dict(record)
+
+    del record["score"], record["score_delta"]
+    assert len(record) == 3
+    with pytest.raises(KeyError):
+        record["score"]
+
+def test_record_has_no_instance_dict():
+    record = DeveloperRecord(username="user1")
+    assert not hasattr(record, "__dict__")
+    with pytest.raises(AttributeError):
+        record.unknown = 1
+
+def test_records_round_trip_through_frames():
+    df = pd.DataFrame({"username": ["a", "b"], "score": [10, 20], "commits_30d": [1, 2]})
+
+    records = DeveloperRecord.from_frame(df)
+    assert records == df.to_dict(orient="records")
+    assert type(records[0]["score"]) is int
+
+    records[1]["manager"] = "M"
+    frame = records_frame(records)
+    assert list(frame.columns) == ["username", "score", "commits_30d", "manager"]
+    assert math.isnan(frame["manager"][0])
+    assert frame["manager"][1] == "M"
+
+def test_records_frame_matches_list_of_dicts():
+    dicts = [{"username": "a", "score": 1}, {"username": "b", "fullname": None}]
+    expected = pd.DataFrame(dicts)
+    pd.testing.assert_frame_equal(records_frame([DeveloperRecord(d) for d in dicts])[expected.columns], expected)
+    assert set(SCHEMA) >= set(expected.columns)
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+from github_handler import GitHubHandler, RequestScheduler
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "benchmarks"))
+from fake_graphql_server import FakeGitHubServer, synthetic_user  # noqa: E402
+
+@pytest.fixture
+def server():
+    with FakeGitHubServer() as server:
+        yield server
+
+@pytest.fixture
+def github_handler(server):
+    return GitHubHandler("fake_token", server.url, batch_size=3,
+                         scheduler=RequestScheduler(requests_per_minute=0, max_retries=0))
+
+def test_single_user_query(github_handler):
+    metrics = github_handler.get_developer_metrics("dev1")
+    expected = synthetic_user("dev1")
+    assert metrics['commits'] == expected['contributionsCollection']['totalCommitContributions']
+    assert metrics['lines_added'] == sum(pr['additions'] for pr in expected['pullRequests']['nodes'])
+
+def test_batched_query_with_unknown_login(github_handler, server):
+    metrics = github_handler.get_developers_metrics(["dev1", "ghost1", "dev2", "dev3"])
+    assert server.requests == 2
+    assert metrics["ghost1"]['commits'] == 0
+    assert metrics["dev3"]['repositories_contributed'] == synthetic_user("dev3")['repositoriesContributedTo']['totalCount']
+
+def test_rate_limit_exhaustion_returns_403(server):
+    server.rate_limit = 1
+    server._remaining = 1
+    status, headers, _ = server.answer({"query": "query { rateLimit { cost } }"})
+    assert status == 403
+    assert headers["X-RateLimit-Remaining"] == "0"
@@ -1,13 +1,22 @@
 import pytest
-from github_handler import GitHubHandler
+import requests
+from cache_handler import ResponseCache
+from sync_handler import PullRequestSync
+from github_handler import GitHubHandler, RequestScheduler, TokenPool, create_session
+from query_builder import QueryPlan
+from datetime import datetime, timedelta, timezone
 
 @pytest.fixture
-def github_handler():
-    return GitHubHandler("fake_token", "https://api.github.com/graphql")
+def session(mocker):
+    return mocker.MagicMock()
 
 @pytest.fixture
-def mock_response(mocker):
-    mock = mocker.patch("github_handler.requests.post")
+def github_handler(session):
+    return GitHubHandler("fake_token", "https://api.github.com/graphql", session=session)
+
+@pytest.fixture
+def mock_response(session):
+    mock = session.post
     mock.return_value.status_code = 200
     mock.return_value.json.return_value = {
         "data": {
@@ -32,10 +41,471 @@ def test_get_developer_metrics(github_handler, mock_response):
     assert metrics['lines_added'] == 100
     assert metrics['lines_removed'] == 50
 
-def test_get_developer_metrics_handles_empty_response(github_handler, mocker):
-    mock = mocker.patch("github_handler.requests.post")
+def test_get_developer_metrics_handles_empty_response(github_handler, session):
+    mock = session.post
     mock.return_value.status_code = 200
     mock.return_value.json.return_value = {"data": {"user": None}}
     
     metrics = github_handler.get_developer_metrics("user1")
-    assert metrics['commits'] == 0
\ No newline at end of file
+    assert metrics['commits'] == 0
+
+def test_build_batch_query_aliases_users(github_handler):
+    query = github_handler.build_batch_query(3)
+    assert "$u0: String!, $u1: String!, $u2: String!" in query
+    assert "u2: user(login: $u2)" in query
+
+def test_get_developers_metrics_batches_requests(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", batch_size=2, session=session)
+    user = {
+        "contributionsCollection": {
+            "totalCommitContributions": 10,
+            "totalPullRequestContributions": 5,
+            "pullRequestReviewContributions": {"totalCount": 1}
+        },
+        "repositoriesContributedTo": {"nodes": [], "totalCount": 2},
+        "pullRequests": {"nodes": [{"additions": 100, "deletions": 50}]},
+        "organizations": {"nodes": []}
+    }
+    mock = session.post
+    mock.return_value.status_code = 200
+    mock.return_value.json.side_effect = [
+        {"data": {"u0": user, "u1": user}},
+        {"data": {"u0": user}},
+    ]
+
+    metrics = handler.get_developers_metrics(["user1", "user2", "user3"])
+
+    assert mock.call_count == 2
+    assert [m['commits'] for m in metrics.values()] == [10, 10, 10]
+
+def test_fetch_contributions_batch_isolates_alias_errors(github_handler, session):
+    mock = session.post
+    mock.return_value.status_code = 200
+    mock.return_value.json.return_value = {
+        "data": {"u0": {"login": "user1"}, "u1": None, "u2": None},
+        "errors": [
+            {"type": "NOT_FOUND", "path": ["u1"], "message": "Could not resolve to a User"},
+            {"type": "INTERNAL", "path": ["u2", "pullRequests"], "message": "Something went wrong"}
+        ]
+    }
+
+    users = github_handler.fetch_contributions_batch(["user1", "ghost", "flaky"], "2025-01-01T00:00:00", False)
+
+    assert users == {"user1": {"login": "user1"}, "ghost": {}, "flaky": None}
+
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(requests_per_minute=0, sleep=lambda seconds: None, clock=lambda: 1000.0)
+
+def make_response(mocker, status_code, headers=None, body=None):
+    response = mocker.MagicMock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.json.return_value = body if body is not None else {"data": {}}
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(f"{status_code} Error")
+    return response
+
+def test_get_developer_metrics_returns_none_on_http_failure(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql",
+                            scheduler=RequestScheduler(max_retries=0), session=session)
+    mock = session.post
+    mock.return_value.status_code = 502
+    mock.return_value.raise_for_status.side_effect = requests.HTTPError("502 Bad Gateway")
+
+    assert handler.get_developer_metrics("user1") is None
+
+def test_scheduler_retries_transient_errors(scheduler, mocker):
+    sleeps = []
+    scheduler.sleep = sleeps.append
+    send = mocker.MagicMock(side_effect=[
+        make_response(mocker, 502),
+        make_response(mocker, 503),
+        make_response(mocker, 200, body={"data": {"user": {}}}),
+    ])
+
+    data = scheduler.execute(send)
+
+    assert data == {"data": {"user": {}}}
+    assert send.call_count == 3
+    assert 0.5 <= sleeps[0] <= 1.0 and 1.0 <= sleeps[1] <= 2.0
+
+def test_scheduler_honours_retry_after(scheduler, mocker):
+    sleeps = []
+    scheduler.sleep = sleeps.append
+    send = mocker.MagicMock(side_effect=[
+        make_response(mocker, 429, headers={"Retry-After": "30"}),
+        make_response(mocker, 200),
+    ])
+
+    scheduler.execute(send)
+
+    assert 30 in sleeps
+
+def test_scheduler_waits_for_rate_limit_reset(scheduler, mocker):
+    sleeps = []
+    scheduler.sleep = sleeps.append
+    send = mocker.MagicMock(side_effect=[
+        make_response(mocker, 403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1120"}),
+        make_response(mocker, 200),
+    ])
+
+    scheduler.execute(send)
+
+    assert 121 in sleeps
+
+def test_scheduler_gives_up_after_max_retries(scheduler, mocker):
+    scheduler.max_retries = 2
+    send = mocker.MagicMock(return_value=make_response(mocker, 500))
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.execute(send)
+    assert send.call_count == 3
+
+def test_scheduler_spreads_low_budget_until_reset(scheduler):
+    scheduler.update_budget({"rateLimit": {"limit": 5000, "cost": 2, "remaining": 100,
+                                           "resetAt": "1970-01-01T00:26:40Z"}})
+
+    # 600 seconds until reset, 50 requests left
+    assert scheduler._interval(1000.0) == pytest.approx(12.0)
+
+
+def test_requests_use_session_with_timeouts(github_handler, mock_response):
+    github_handler.get_developer_metrics("user1")
+    _, kwargs = mock_response.call_args
+    assert kwargs['timeout'] == GitHubHandler.DEFAULT_TIMEOUT
+    assert kwargs['headers'] == {"Authorization": "token fake_token"}
+
+def test_create_session_pools_connections():
+    session = create_session(pool_size=4)
+    adapter = session.get_adapter("https://api.github.com/graphql")
+    assert adapter._pool_maxsize == 4
+    assert "gzip" in session.headers["Accept-Encoding"]
+
+def test_connection_stats_without_requests():
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql")
+    assert handler.connection_stats() == {"requests": 0, "connections": 0, "reused": 0}
+
+def test_batch_fetch_only_requests_cache_misses(session, tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, cache=cache)
+    cache.set("user1", "2025-01-01T00:00:00", None, GitHubHandler.USER_FIELDS, {"login": "user1"})
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {"data": {"u0": {"login": "user2"}}}
+
+    users = handler.fetch_contributions_batch(["user1", "user2"], "2025-01-01T00:00:00", False)
+
+    assert users == {"user1": {"login": "user1"}, "user2": {"login": "user2"}}
+    _, kwargs = session.post.call_args
+    assert kwargs['json']['variables']['u0'] == "user2"
+    assert cache.get("user2", "2025-01-01T00:00:00", None, GitHubHandler.USER_FIELDS) == {"login": "user2"}
+
+def pull_request_page(nodes, end_cursor, has_next_page):
+    return {"data": {"user": {"pullRequests": {
+        "pageInfo": {"hasNextPage": has_next_page, "endCursor": end_cursor},
+        "nodes": [
+            {"id": pr_id, "mergedAt": updated_at, "updatedAt": updated_at, "additions": 10, "deletions": 1}
+            for pr_id, updated_at in nodes
+        ]
+    }}}}
+
+def test_sync_pull_requests_fetches_only_new_activity(session, tmp_path):
+    sync = PullRequestSync(str(tmp_path / "sync.db"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, sync=sync)
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.side_effect = [
+        pull_request_page([("pr3", "2025-03-03T00:00:00Z"), ("pr2", "2025-03-02T00:00:00Z")], "c1", True),
+        pull_request_page([("pr1", "2025-03-01T00:00:00Z")], "c2", False),
+        pull_request_page([("pr4", "2025-03-04T00:00:00Z"), ("pr3", "2025-03-03T00:00:00Z")], "c3", True),
+    ]
+
+    first = handler.sync_pull_requests("user1", "2025-01-01T00:00:00Z")
+    second = handler.sync_pull_requests("user1", "2025-01-01T00:00:00Z")
+
+    assert first == {"lines_added": 30, "lines_removed": 3}
+    assert second == {"lines_added": 40, "lines_removed": 4}
+    assert session.post.call_count == 3
+    assert sync.get_state("user1") == ("2025-03-04T00:00:00Z", None, None)
+
+def test_sync_pull_requests_backfills_a_longer_window(session, tmp_path):
+    sync = PullRequestSync(str(tmp_path / "sync.db"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, sync=sync)
+    nodes = [("pr3", "2025-03-03T00:00:00Z"), ("pr2", "2025-03-02T00:00:00Z"), ("pr1", "2025-02-15T00:00:00Z")]
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.side_effect = [
+        pull_request_page(nodes, "c1", True),
+        pull_request_page(nodes, "c2", False),
+    ]
+
+    assert handler.sync_pull_requests("user1", "2025-03-01T00:00:00Z") == {"lines_added": 20, "lines_removed": 2}
+    assert handler.sync_pull_requests("user1", "2025-02-01T00:00:00Z") == {"lines_added": 30, "lines_removed": 3}
+    assert sync.synced_since("user1") == "2025-02-01T00:00:00Z"
+    assert sync.get_state("user1") == ("2025-03-03T00:00:00Z", None, None)
+
+def test_sync_covers_windows_longer_than_days_back(session, tmp_path):
+    sync = PullRequestSync(str(tmp_path / "sync.db"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, sync=sync,
+                            query_plan=QueryPlan(pull_requests=False, windows=[365]))
+    now = datetime.now(timezone.utc)
+    dates = [(now - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ") for days in (5, 200)]
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = pull_request_page(
+        [("pr2", dates[0]), ("pr1", dates[1])], "c1", False
+    )
+
+    metrics = handler._apply_sync({"username": "user1"}, days_back=30)
+
+    assert metrics["lines_added"] == 10
+    assert metrics["lines_added_365d"] == 20
+
+def search_page(merged_dates, end_cursor, has_next_page, issue_count=None):
+    return {"data": {"search": {
+        "issueCount": len(merged_dates) if issue_count is None else issue_count,
+        "pageInfo": {"hasNextPage": has_next_page, "endCursor": end_cursor},
+        "nodes": [{"mergedAt": merged_at, "additions": 10, "deletions": 1} for merged_at in merged_dates]
+    }}}
+
+def test_search_lines_pages_through_in_window_pull_requests(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, search_lines=True,
+                            query_plan=QueryPlan(organizations=True, pull_requests=False, windows=[30]))
+    user = {
+        "contributionsCollection": {"totalCommitContributions": 1, "totalPullRequestContributions": 3,
+                                    "pullRequestReviewContributions": {"totalCount": 0}},
+        "contributions_30d": {"totalCommitContributions": 0, "totalPullRequestContributions": 1,
+                              "pullRequestReviewContributions": {"totalCount": 0}},
+        "repositoriesContributedTo": {"nodes": [], "totalCount": 1},
+        "organizations": {"nodes": [{"login": "org2"}, {"login": "org1"}]}
+    }
+    recent = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.side_effect = [
+        {"data": {"user": user}},
+        search_page([recent, "2000-01-01T00:00:00Z"], "c1", True),
+        search_page([recent], "c2", False),
+    ]
+
+    metrics = handler.get_developer_metrics("user1", days_back=90, exclude_private=True, only_organizations=True)
+
+    assert "pullRequests" not in handler.graphql_query
+    assert metrics["lines_added"] == 20
+    assert metrics["lines_removed"] == 2
+    assert metrics["lines_added_30d"] == 20
+    searches = [call.kwargs["json"]["variables"] for call in session.post.call_args_list[1:]]
+    assert searches[0]["query"].startswith("author:user1 is:pr is:merged merged:>=")
+    assert searches[0]["query"].endswith(" is:public org:org1 org:org2")
+    assert [search["after"] for search in searches] == [None, "c1"]
+
+def test_search_lines_skips_search_without_organizations(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, search_lines=True)
+
+    assert handler.search_pull_request_lines("user1", organizations=set()) == {"lines_added": 0, "lines_removed": 0}
+    session.post.assert_not_called()
+
+def test_search_lines_fails_on_graphql_errors(github_handler, session):
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {"errors": [{"message": "Something went wrong"}]}
+
+    assert github_handler.search_pull_request_lines("user1") is None
+
+def test_record_archives_raw_responses(session, mock_response, tmp_path):
+    from response_archive import ResponseArchive
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, archive=archive)
+
+    handler.get_developer_metrics("user1", exclude_private=True)
+    archive.close()
+
+    [(entry, payload)] = archive.read(archive.entries())
+    assert (entry["username"], entry["privacy"]) == ("user1", "PUBLIC")
+    assert payload == mock_response.return_value.json.return_value["data"]["user"]
+    assert handler.metrics_from_payload("user1", payload, only_organizations=True)["lines_added"] == 100
+
+def test_record_skips_responses_served_from_the_cache(session, mock_response, tmp_path):
+    from response_archive import ResponseArchive
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session, archive=archive,
+                            cache=ResponseCache(str(tmp_path / "cache.db")))
+
+    handler.get_developer_metrics("user1")
+    handler.get_developer_metrics("user1")
+    handler.get_developers_metrics(["user1"])
+    archive.close()
+
+    assert session.post.call_count == 1
+    assert [(entry["username"], entry["line_source"]) for entry in archive.entries()] == [("user1", "pull_requests")]
+
+def test_token_pool_prefers_most_remaining_budget():
+    pool = TokenPool(["token_a", "token_b"])
+    pool.update(pool.budgets[0], {"limit": 5000, "cost": 1, "remaining": 100, "resetAt": "2100-01-01T00:00:00Z"})
+    pool.update(pool.budgets[1], {"limit": 5000, "cost": 1, "remaining": 4000, "resetAt": "2100-01-01T00:00:00Z"})
+
+    assert pool.acquire(1000.0).token == "token_b"
+
+def test_token_pool_counts_requests_when_every_token_is_exhausted():
+    pool = TokenPool(["token_a", "token_b"])
+    pool.exhaust(pool.budgets[0], 2000.0)
+    pool.exhaust(pool.budgets[1], 1500.0)
+
+    assert pool.acquire(1000.0).token == "token_b"
+    assert [entry["requests"] for entry in pool.usage()] == [0, 1]
+
+def test_scheduler_rotates_exhausted_token(scheduler, mocker):
+    scheduler.use_tokens(["token_a", "token_b"])
+    send = mocker.MagicMock(side_effect=[
+        make_response(mocker, 403, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "4600"}),
+        make_response(mocker, 200),
+    ])
+
+    scheduler.execute(send)
+
+    assert [call.args[0] for call in send.call_args_list] == ["token_a", "token_b"]
+    assert scheduler.pool.budgets[0].remaining == 0
+
+def test_scheduler_backs_off_when_the_only_token_is_rate_limited(scheduler, mocker):
+    sleeps = []
+    scheduler.sleep = sleeps.append
+    rate_limited = {"errors": [{"type": "RATE_LIMITED", "message": "API rate limit exceeded"}]}
+    send = mocker.MagicMock(side_effect=[
+        make_response(mocker, 200, body=rate_limited),
+        make_response(mocker, 403, headers={"X-RateLimit-Remaining": "0"}),
+        make_response(mocker, 200, body={"data": {"user": {}}}),
+    ])
+
+    assert scheduler.execute(send) == {"data": {"user": {}}}
+    assert len(sleeps) == 2 and all(seconds > 0 for seconds in sleeps)
+
+def test_scheduler_drops_revoked_token(scheduler, mocker):
+    scheduler.use_tokens(["token_a", "token_b"])
+    send = mocker.MagicMock(side_effect=[make_response(mocker, 401), make_response(mocker, 200)])
+
+    scheduler.execute(send)
+
+    usage = scheduler.pool.usage()
+    assert [entry['status'] for entry in usage] == ["revoked", "active"]
+    assert usage[1]['token'] == "...en_b"
+
+def test_scheduler_raises_when_every_token_is_revoked(scheduler, mocker):
+    scheduler.use_tokens(["token_a"])
+    send = mocker.MagicMock(return_value=make_response(mocker, 401))
+
+    with pytest.raises(requests.HTTPError):
+        scheduler.execute(send)
+
+def test_token_usage_counts_points(github_handler, session):
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {
+        "data": {"user": None, "rateLimit": {"limit": 5000, "cost": 3, "remaining": 4997,
+                                              "resetAt": "2100-01-01T00:00:00Z"}}
+    }
+
+    github_handler.get_developer_metrics("user1")
+
+    assert github_handler.token_usage() == [
+        {"token": "...oken", "requests": 1, "points": 3, "remaining": 4997, "status": "active"}
+    ]
+
+def test_query_plan_drops_unused_fields(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session,
+                            query_plan=QueryPlan(organizations=False, pull_requests=False))
+
+    assert "organizations" not in handler.graphql_query
+    assert "pullRequests" not in handler.graphql_query
+    assert "owner" not in handler.build_batch_query(2)
+
+def test_only_organizations_counts_filtered_repositories(github_handler, session):
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {
+        "data": {
+            "user": {
+                "contributionsCollection": {
+                    "totalCommitContributions": 1,
+                    "totalPullRequestContributions": 0,
+                    "pullRequestReviewContributions": {"totalCount": 0}
+                },
+                "repositoriesContributedTo": {
+                    "nodes": [{"owner": {"login": "org1"}}, {"owner": {"login": "someone"}}],
+                    "totalCount": 2
+                },
+                "organizations": {"nodes": [{"login": "org1"}]}
+            }
+        }
+    }
+
+    metrics = github_handler.get_developer_metrics("user1", only_organizations=True)
+
+    assert metrics['repositories_contributed'] == 1
+    assert metrics['lines_added'] == 0
+
+def test_estimate_run_cost_uses_dry_run(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", batch_size=2, session=session)
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {"data": {"rateLimit": {"cost": 4}}}
+
+    estimate = handler.estimate_run_cost(["a", "b", "c", "d", "e"])
+
+    assert "rateLimit(dryRun: true)" in session.post.call_args.kwargs["json"]["query"]
+    assert estimate == {"requests": 3, "cost_per_request": 4, "total_cost": 12}
+    # The dry run itself is not charged to the token
+    assert handler.token_usage()[0]["points"] == 0
+
+def test_windows_are_fetched_in_the_same_request(session):
+    handler = GitHubHandler("fake_token", "https://api.github.com/graphql", session=session,
+                            query_plan=QueryPlan(windows=[30]))
+    recent = (datetime.now(timezone.utc) - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    old = (datetime.now(timezone.utc) - timedelta(days=100)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    window = {
+        "totalCommitContributions": 4,
+        "totalPullRequestContributions": 1,
+        "pullRequestReviewContributions": {"totalCount": 2}
+    }
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {
+        "data": {
+            "user": {
+                "contributionsCollection": {**window, "totalCommitContributions": 10},
+                "contributions_30d": window,
+                "repositoriesContributedTo": {"nodes": [], "totalCount": 2},
+                "pullRequests": {"nodes": [{"mergedAt": recent, "additions": 10, "deletions": 5},
+                                           {"mergedAt": old, "additions": 100, "deletions": 50}]}
+            }
+        }
+    }
+
+    metrics = handler.get_developer_metrics("user1")
+
+    assert session.post.call_count == 1
+    assert "since_30d" in session.post.call_args.kwargs["json"]["variables"]
+    assert metrics['commits'] == 10
+    assert metrics['lines_added'] == 110
+    assert metrics['commits_30d'] == 4
+    assert metrics['reviews_30d'] == 2
+    assert metrics['lines_added_30d'] == 10
+    assert metrics['lines_removed_30d'] == 5
+
+def test_probe_activity_batches_developers(github_handler, session):
+    session.post.return_value.status_code = 200
+    session.post.return_value.json.return_value = {
+        "data": {
+            "u0": {"contributionsCollection": {"hasAnyContributions": True, "hasAnyRestrictedContributions": False}},
+            "u1": {"contributionsCollection": {"hasAnyContributions": False, "hasAnyRestrictedContributions": False}},
+            "u2": None
+        },
+        "errors": [{"type": "NOT_FOUND", "path": ["u2"]}]
+    }
+
+    since = [(datetime.now() - timedelta(days=days)).isoformat() for days in (10, 20, 30)]
+    activity = github_handler.probe_activity({"user1": since[0], "user2": since[1], "ghost": since[2]})
+
+    assert session.post.call_count == 1
+    variables = session.post.call_args.kwargs["json"]["variables"]
+    assert variables["u1"] == "user2" and variables["s1"] == since[1]
+    assert "to" in variables
+    assert "contributionsCollection(from: $s0, to: $to)" in session.post.call_args.kwargs["json"]["query"]
+    assert activity == {"user1": True, "user2": False, "ghost": None}
+
+def test_probe_activity_treats_developers_older_than_a_year_as_active(github_handler, session):
+    activity = github_handler.probe_activity({"user1": (datetime.now() - timedelta(days=400)).isoformat()})
+
+    assert activity == {"user1": True}
+    session.post.assert_not_called()
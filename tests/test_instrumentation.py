@@ -0,0 +1,42 @@
+import json
+import pytest
+from instrumentation import Instrumentation
+
+@pytest.fixture
+def instrumentation():
+    ticks = iter([0.0, 1.5, 10.0, 10.25])
+    return Instrumentation(clock=lambda: next(ticks))
+
+def test_timer_accumulates_per_phase(instrumentation):
+    with instrumentation.timer("save_data"):
+        pass
+    with instrumentation.timer("save_data"):
+        pass
+    assert instrumentation.timings["save_data"] == {"count": 2, "seconds": 1.75}
+
+def test_histogram_buckets_are_cumulative(instrumentation):
+    instrumentation.observe("request_latency_seconds", 0.2, buckets=(0.1, 0.5, 1.0))
+    instrumentation.observe("request_latency_seconds", 0.7, buckets=(0.1, 0.5, 1.0))
+
+    histogram = instrumentation.summary()["histograms"]["request_latency_seconds"]
+    assert histogram["buckets"] == {"0.1": 0, "0.5": 1, "1.0": 2}
+    assert histogram["count"] == 2
+
+def test_write_json(instrumentation, tmp_path):
+    instrumentation.set_gauge("graphql_remaining", 4990)
+    path = tmp_path / "metrics.json"
+    instrumentation.write(str(path))
+    assert json.loads(path.read_text())["gauges"] == {"graphql_remaining": 4990}
+
+def test_write_prometheus_textfile(instrumentation, tmp_path):
+    with instrumentation.timer("append_metrics"):
+        pass
+    instrumentation.observe("request_latency_seconds", 0.2, buckets=(0.1, 0.5))
+    instrumentation.set_gauge("graphql_cost", 1)
+    path = tmp_path / "metrics.prom"
+    instrumentation.write(str(path))
+
+    text = path.read_text()
+    assert 'github_dev_stats_phase_seconds_total{phase="append_metrics"} 1.5' in text
+    assert 'github_dev_stats_request_latency_seconds_bucket{le="+Inf"} 1' in text
+    assert "github_dev_stats_graphql_cost 1" in text
@@ -0,0 +1,62 @@
+import os
+import pytest
+from unittest.mock import MagicMock
+from journal_handler import Journal
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = Journal(str(tmp_path / "developers.csv.journal"))
+    yield journal
+    journal.close()
+
+def test_replay_returns_appended_records(journal):
+    journal.open()
+    journal.append({"username": "user1", "score": 10})
+    journal.append({"username": "user2", "score": 20})
+    journal.append({"username": "user1", "score": 30})
+
+    assert journal.replay() == [{"username": "user1", "score": 30}, {"username": "user2", "score": 20}]
+
+def test_replay_ignores_truncated_last_line(journal):
+    journal.open()
+    journal.append({"username": "user1", "score": 10})
+    journal.close()
+    with open(journal.filepath, "a") as f:
+        f.write('{"username": "user2", "sc')
+
+    assert journal.replay() == [{"username": "user1", "score": 10}]
+
+def test_resume_after_truncated_last_line_keeps_new_records(journal):
+    journal.open()
+    journal.append({"username": "user1", "score": 10})
+    journal.close()
+    with open(journal.filepath, "a") as f:
+        f.write('{"username": "user2", "sc')
+
+    journal.open(resume=True)
+    journal.append({"username": "user3", "score": 30})
+    journal.append({"username": "user4", "score": 40})
+
+    assert [record["username"] for record in journal.replay()] == ["user1", "user3", "user4"]
+
+def test_open_without_resume_discards_previous_journal(journal):
+    journal.open()
+    journal.append({"username": "user1", "score": 10})
+    journal.close()
+
+    journal.open(resume=True)
+    assert len(journal.replay()) == 1
+    journal.close()
+
+    journal.open()
+    assert journal.replay() == []
+
+def test_compact_writes_storage_and_removes_journal(journal):
+    storage = MagicMock()
+    journal.open()
+    journal.append({"username": "user1", "score": 10})
+
+    journal.compact(storage)
+
+    storage.append_metrics.assert_called_once_with([{"username": "user1", "score": 10}])
+    assert not os.path.exists(journal.filepath)
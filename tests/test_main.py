@@ -25,4 +25,229 @@ def test_parse_args_order_by(mocker):
     mocker.patch('sys.argv', ['main.py', '--order-by', 'score'])
     from main import parse_args
     args = parse_args()
-    assert args.order_by == 'score'
\ No newline at end of file
+    assert args.order_by == 'score'
+
+def test_process_batch_preserves_order():
+    from main import process_batch
+    mock_handler = MagicMock()
+    mock_handler.get_developers_metrics.return_value = {
+        username: {"commits": 0, "pull_requests": 0, "reviews": 0, "repositories_contributed": 0,
+                   "lines_added": 0, "lines_removed": 0}
+        for username in ("user2", "user1")
+    }
+
+    args = type("Args", (), {"days_back": 365, "exclude_private": False, "only_organizations": False})
+    updated = process_batch([{"username": "user1"}, {"username": "user2"}], mock_handler, args)
+
+    assert [dev['username'] for dev in updated] == ["user1", "user2"]
+
+
+def test_process_developers_concurrent_preserves_order():
+    from main import process_developers
+    mock_handler = MagicMock()
+    mock_handler.get_developer_metrics.side_effect = lambda username, **kwargs: {
+        "commits": int(username[4:]), "pull_requests": 0, "reviews": 0, "repositories_contributed": 0,
+        "lines_added": 0, "lines_removed": 0
+    }
+
+    developers = [{"username": f"user{i}"} for i in range(20)]
+    args = type("Args", (), {"days_back": 365, "exclude_private": False, "only_organizations": False,
+                             "batch_size": 1, "concurrency": 4})
+    updated = process_developers(developers, mock_handler, args)
+
+    assert [dev['commits'] for dev in updated] == list(range(20))
+
+
+def test_process_developer_skips_failed_fetch():
+    mock_handler = MagicMock()
+    mock_handler.get_developer_metrics.return_value = None
+
+    developer = {"username": "user1", "score": 42, "last_updated": "2025-04-20"}
+    args = type("Args", (), {"days_back": 365, "exclude_private": False, "only_organizations": False})
+
+    assert process_developer(developer, mock_handler, args) is None
+    assert developer == {"username": "user1", "score": 42, "last_updated": "2025-04-20"}
+
+
+def test_process_developers_journals_results():
+    from main import process_developers
+    mock_handler = MagicMock()
+    mock_handler.get_developer_metrics.side_effect = [
+        {"commits": 1, "pull_requests": 0, "reviews": 0, "repositories_contributed": 0,
+         "lines_added": 0, "lines_removed": 0},
+        None
+    ]
+    journal = MagicMock()
+
+    args = type("Args", (), {"days_back": 365, "exclude_private": False, "only_organizations": False,
+                             "batch_size": 1, "concurrency": 1})
+    process_developers([{"username": "user1"}, {"username": "user2"}], mock_handler, args, journal=journal)
+
+    journal.append.assert_called_once()
+    assert journal.append.call_args[0][0]['username'] == "user1"
+
+
+def test_load_tokens_merges_sources(mocker, tmp_path):
+    from main import load_tokens
+    tokens_file = tmp_path / "tokens.txt"
+    tokens_file.write_text("# pool\ntoken_c\ntoken_a\n")
+    mocker.patch.dict('os.environ', {
+        "GITHUB_TOKENS": "token_a, token_b",
+        "GITHUB_TOKENS_FILE": str(tokens_file),
+        "GITHUB_TOKEN": "token_d"
+    })
+
+    assert load_tokens() == ["token_a", "token_b", "token_c", "token_d"]
+
+def test_score_developer_scores_each_window():
+    from main import score_developer
+    metrics = {"commits": 700, "pull_requests": 100, "reviews": 100, "repositories_contributed": 30,
+               "lines_added": 0, "lines_removed": 0,
+               "commits_30d": 0, "pull_requests_30d": 0, "reviews_30d": 0,
+               "lines_added_30d": 0, "lines_removed_30d": 0}
+
+    developer = score_developer({"username": "user1"}, metrics, windows=[30])
+
+    assert developer['score'] == 85
+    assert developer['score_30d'] == 10
+
+def test_parse_args_windows():
+    from main import parse_args
+    assert parse_args(["--windows", "30,90,30"]).windows == [30, 90]
+    assert parse_args([]).windows == []
+    with pytest.raises(SystemExit):
+        parse_args(["--windows", "30,abc"])
+
+def test_parse_args_shards():
+    from main import parse_args
+    args = parse_args(["merge", "--shard-count", "4"])
+    assert args.command == "merge"
+    assert parse_args([]).command == "run"
+    with pytest.raises(SystemExit):
+        parse_args(["--shard-index", "4", "--shard-count", "4"])
+
+def test_parse_args_search_lines():
+    from main import parse_args
+    assert parse_args(["--search-lines"]).search_lines
+    with pytest.raises(SystemExit):
+        parse_args(["--search-lines", "--incremental"])
+
+def test_probe_developers_skips_idle_developers():
+    from main import probe_developers
+    mock_handler = MagicMock()
+    mock_handler.probe_activity.return_value = {"user1": True, "user2": False, "user3": None}
+    developers = [
+        {"username": "user1", "last_updated": "2025-01-01"},
+        {"username": "user2", "last_updated": "2025-01-01", "score": 40},
+        {"username": "user3", "last_updated": "2025-01-01"},
+        {"username": "user4", "last_updated": float("nan")},
+    ]
+
+    active, idle = probe_developers(developers, mock_handler)
+
+    assert "user4" not in mock_handler.probe_activity.call_args.args[0]
+    assert [dev['username'] for dev in active] == ["user1", "user3", "user4"]
+    assert idle == [
+        {"username": "user2", "last_updated": datetime.now().strftime('%Y-%m-%d'), "score": 40, "score_delta": 0}
+    ]
+
+def test_score_developer_records_score_delta():
+    from main import score_developer
+    metrics = {"commits": 700, "pull_requests": 0, "reviews": 0, "repositories_contributed": 0,
+               "lines_added": 0, "lines_removed": 0}
+
+    assert score_developer({"username": "user1", "score": 20.0}, dict(metrics))['score_delta'] == 10
+    assert 'score_delta' not in score_developer({"username": "user1", "score": float("nan")}, dict(metrics))
+
+def test_parse_args_tiers():
+    from main import parse_args
+    assert parse_args([]).tiers == {"active": 1, "quiet": 7, "dormant": 30}
+    assert parse_args(["--tiers", "1,1,1", "--budget", "50"]).tiers == {"active": 1, "quiet": 1, "dormant": 1}
+    with pytest.raises(SystemExit):
+        parse_args(["--tiers", "1,7"])
+
+def test_parse_args_rank():
+    from main import parse_args
+    args = parse_args(["rank", "octocat"])
+    assert (args.command, args.username) == ("rank", "octocat")
+    assert parse_args(["rank", "--tier", "top"]).tier == "top"
+
+def test_process_organizations_fetches_non_members_individually(mocker):
+    from main import process_organizations
+    zero = {"commits": 0, "pull_requests": 0, "reviews": 0, "repositories_contributed": 0,
+            "lines_added": 0, "lines_removed": 0}
+    collector = mocker.patch("org_collector.OrganizationCollector")
+    collector.return_value.collect.return_value = {"alice": {**zero, "username": "alice", "commits": 700}}
+    mock_handler = MagicMock()
+    mock_handler.get_developer_metrics.return_value = dict(zero)
+
+    args = type("Args", (), {"days_back": 365, "exclude_private": False, "only_organizations": False,
+                             "batch_size": 1, "concurrency": 1, "org": ["acme"]})
+    updated = process_organizations([{"username": "Alice"}, {"username": "outsider"}], mock_handler, args)
+
+    assert [dev['username'] for dev in updated] == ["Alice", "outsider"]
+    assert updated[0]['commits'] == 700
+    mock_handler.get_developer_metrics.assert_called_once()
+    assert mock_handler.get_developer_metrics.call_args.args[0] == "outsider"
+
+def test_replay_archive_rescores_from_recorded_responses(tmp_path):
+    from main import parse_args, replay_archive
+    from response_archive import ResponseArchive
+    from storage import open_storage
+
+    user = {
+        "contributionsCollection": {"totalCommitContributions": 10, "totalPullRequestContributions": 5,
+                                    "pullRequestReviewContributions": {"totalCount": 1}},
+        "contributions_30d": {"totalCommitContributions": 2, "totalPullRequestContributions": 1,
+                              "pullRequestReviewContributions": {"totalCount": 0}},
+        "repositoriesContributedTo": {"nodes": [{"owner": {"login": "acme"}}, {"owner": {"login": "user1"}}],
+                                      "totalCount": 2},
+        "pullRequests": {"nodes": [{"mergedAt": "2025-02-20T00:00:00Z", "additions": 100, "deletions": 50},
+                                   {"mergedAt": "2024-12-01T00:00:00Z", "additions": 10, "deletions": 5}]},
+        "organizations": {"nodes": [{"login": "acme"}]}
+    }
+    config = {"ARCHIVE_FILE_PATH": str(tmp_path / "responses.gz"), "GITHUB_TOKENS": [],
+              "GITHUB_API_URL": "http://localhost"}
+    archive = ResponseArchive(config["ARCHIVE_FILE_PATH"])
+    archive.append("user1", user, "2024-03-01T00:00:00", None, windows=[30], fetched_at="2025-03-01T00:00:00Z")
+    archive.append("user2", user, "2024-03-01T00:00:00", None, fetched_at="2025-03-01T00:00:00Z")
+    archive.close()
+
+    storage = open_storage(str(tmp_path / "developers.csv"), None)
+    storage.save_data([{"username": "user1", "fullname": "User One", "score": 1},
+                       {"username": "user2", "fullname": "User Two", "score": 1},
+                       {"username": "user3", "fullname": "User Three", "score": 1}])
+
+    args = parse_args(["replay", "--windows", "30", "--only-organizations"])
+    assert replay_archive(storage, args, config) == 1
+
+    developers = storage.load_data().set_index("username")
+    assert developers.loc["user1", "repositories_contributed"] == 1
+    assert developers.loc["user1", "lines_added"] == 110
+    # The window is counted back from the fetch date, not from the replay date
+    assert developers.loc["user1", "lines_added_30d"] == 100
+    assert developers.loc["user1", "last_updated"] == "2025-03-01"
+    assert developers.loc["user2", "score"] == 1
+
+def test_replay_archive_warns_about_other_line_sources(tmp_path, caplog):
+    from main import parse_args, replay_archive
+    from response_archive import ResponseArchive
+    from storage import open_storage
+
+    config = {"ARCHIVE_FILE_PATH": str(tmp_path / "responses.gz"), "GITHUB_TOKENS": [],
+              "GITHUB_API_URL": "http://localhost"}
+    archive = ResponseArchive(config["ARCHIVE_FILE_PATH"])
+    archive.append("user1", {}, "2024-03-01T00:00:00", None, line_source="search")
+    archive.close()
+    storage = open_storage(str(tmp_path / "developers.csv"), None)
+    storage.save_data([{"username": "user1", "fullname": "User One"}])
+
+    assert replay_archive(storage, parse_args(["replay"]), config) == 1
+    assert "1 responses were recorded by runs counting lines with --incremental or --search-lines" in caplog.text
+
+def test_excluded_requests_lists_unpriced_requests():
+    from main import excluded_requests, parse_args
+    assert excluded_requests(250, parse_args([])) == []
+    excluded = excluded_requests(250, parse_args(["--probe", "--search-lines"]))
+    assert excluded[0] == "3 activity probe requests (--probe)"
+    assert excluded[1].startswith("at least 250 search requests")
@@ -0,0 +1,104 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+import pytest
+from github_handler import GitHubHandler, RequestScheduler
+from org_collector import OrganizationCollector
+from query_builder import QueryPlan
+
+def ago(days):
+    return (datetime.now(timezone.utc) - timedelta(days=days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def page(nodes, end_cursor=None):
+    return {"pageInfo": {"hasNextPage": end_cursor is not None, "endCursor": end_cursor}, "nodes": nodes}
+
+def pull_request(author, merged_days_ago, additions, reviewers=()):
+    return {
+        "mergedAt": ago(merged_days_ago), "updatedAt": ago(merged_days_ago),
+        "additions": additions, "deletions": 1, "author": {"login": author},
+        "reviews": {"nodes": [{"submittedAt": ago(merged_days_ago), "author": {"login": login}}
+                              for login in reviewers]},
+    }
+
+def answer(query, variables):
+    if "membersWithRole" in query:
+        return {"organization": {"membersWithRole": page([{"login": "Alice"}, {"login": "bob"}, {"login": "carol"}])}}
+    if "repositories(" in query:
+        return {"organization": {"repositories": page([
+            {"name": "api", "pushedAt": ago(1)},
+            {"name": "old", "pushedAt": ago(400)},
+        ])}}
+    if "pullRequests" in query:
+        assert variables["name"] == "api"
+        if variables["after"] is None:
+            return {"repository": {"pullRequests": page([
+                pull_request("alice", 5, 100, reviewers=["bob", "bob"]),
+                pull_request("bob", 60, 10, reviewers=["alice"]),
+            ], end_cursor="c1")}}
+        return {"repository": {"pullRequests": page([pull_request("alice", 500, 1000)])}}
+    if "history" in query:
+        return {"repository": {"defaultBranchRef": {"target": {"history": page([
+            {"committedDate": ago(2), "author": {"user": {"login": "alice"}}},
+            {"committedDate": ago(50), "author": {"user": {"login": "bob"}}},
+            {"committedDate": ago(3), "author": {"user": None}},
+        ])}}}}
+    raise AssertionError(query)
+
+def make_handler(windows):
+    session = MagicMock()
+
+    def post(url, json, headers, timeout):
+        response = MagicMock(status_code=200, headers={})
+        response.json.return_value = {"data": answer(json["query"], json["variables"])}
+        return response
+
+    session.post.side_effect = post
+    return GitHubHandler("fake_token", "https://api.github.com/graphql", session=session,
+                         scheduler=RequestScheduler(requests_per_minute=0), query_plan=QueryPlan(windows=windows))
+
+@pytest.fixture
+def handler():
+    return make_handler([30])
+
+def test_collect_aggregates_activity_per_author(handler):
+    metrics = OrganizationCollector(handler).collect(["acme"], days_back=365)
+
+    assert set(metrics) == {"alice", "bob", "carol"}
+    assert metrics["alice"] == {
+        "username": "alice", "repositories_contributed": 1,
+        "commits": 1, "pull_requests": 1, "reviews": 1, "lines_added": 100, "lines_removed": 1,
+        "commits_30d": 1, "pull_requests_30d": 1, "reviews_30d": 0, "lines_added_30d": 100, "lines_removed_30d": 1,
+    }
+    assert metrics["bob"]["reviews"] == 1
+    assert metrics["bob"]["reviews_30d"] == 1
+    assert metrics["bob"]["pull_requests_30d"] == 0
+    assert metrics["carol"]["commits"] == 0
+    # Members, repositories, two pull request pages and one commit page; the stale repository is skipped
+    assert handler.session.post.call_count == 5
+
+def test_collect_returns_none_on_graphql_errors(handler):
+    handler.session.post.side_effect = None
+    handler.session.post.return_value.status_code = 200
+    handler.session.post.return_value.json.return_value = {"errors": [{"type": "NOT_FOUND"}]}
+
+    assert OrganizationCollector(handler).collect(["acme"]) is None
+
+def test_collect_walks_back_to_windows_longer_than_days_back():
+    metrics = OrganizationCollector(make_handler([365])).collect(["acme"], days_back=30)
+
+    assert (metrics["bob"]["pull_requests"], metrics["bob"]["pull_requests_365d"]) == (0, 1)
+    assert (metrics["bob"]["lines_added"], metrics["bob"]["lines_added_365d"]) == (0, 10)
+    assert (metrics["bob"]["commits"], metrics["bob"]["commits_365d"]) == (0, 1)
+    assert (metrics["alice"]["reviews"], metrics["alice"]["reviews_365d"]) == (0, 1)
+    assert (metrics["alice"]["pull_requests"], metrics["alice"]["pull_requests_365d"]) == (1, 1)
+    assert metrics["bob"]["repositories_contributed"] == 0
+
+def test_collect_without_windows_starts_at_days_back():
+    handler = make_handler([])
+
+    metrics = OrganizationCollector(handler).collect(["acme"], days_back=365)
+
+    assert metrics["alice"]["lines_added"] == 100
+    assert handler.session.post.call_count == 5
+    history = [call.kwargs["json"]["variables"] for call in handler.session.post.call_args_list
+               if "history" in call.kwargs["json"]["query"]]
+    assert history[0]["since"][:10] == ago(365)[:10]
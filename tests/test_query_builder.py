@@ -0,0 +1,27 @@
+from query_builder import QueryPlan
+
+def test_default_plan_requests_every_field():
+    fields = QueryPlan().user_fields()
+    assert "organizations(first: 10)" in fields
+    assert "pullRequests(first: 100" in fields
+    assert "repositoriesContributedTo(first: 100" in fields
+    assert "owner" in fields
+
+def test_plan_without_organizations_only_counts_repositories():
+    fields = QueryPlan(organizations=False).user_fields()
+    assert "organizations" not in fields
+    assert "owner" not in fields
+    assert "repositoriesContributedTo(first: 1, privacy: $privacy)" in fields
+
+def test_plan_page_size():
+    fields = QueryPlan(page_size=25).user_fields()
+    assert "pullRequests(first: 25" in fields
+    assert "repositoriesContributedTo(first: 25" in fields
+
+def test_plan_windows_alias_contributions():
+    plan = QueryPlan(windows=[30, 90])
+    fields = plan.user_fields()
+    assert "contributions_30d: contributionsCollection(from: $since_30d)" in fields
+    assert "contributions_90d: contributionsCollection(from: $since_90d)" in fields
+    assert "mergedAt" in fields
+    assert plan.variable_definitions() == ", $since_30d: DateTime!, $since_90d: DateTime!"
@@ -0,0 +1,60 @@
+import random
+from rank_index import RankIndex
+from utils import categorize_developers_batch
+
+def make_index(tmp_path, records=()):
+    source = tmp_path / "developers.csv"
+    source.write_text("")
+    index = RankIndex(str(tmp_path / "developers.csv.rank.json"), str(source))
+    index.rebuild(records)
+    return index
+
+def test_rank_and_percentile_with_ties(tmp_path):
+    index = make_index(tmp_path, [
+        {"username": "a", "fullname": "A", "score": 90},
+        {"username": "b", "fullname": "B", "score": 50.0},
+        {"username": "c", "fullname": "C", "score": 50},
+        {"username": "d", "fullname": "D", "score": 10},
+        {"username": "e", "fullname": "E", "score": float("nan")},
+    ])
+
+    assert len(index) == 4
+    assert index.rank("a") == {"username": "a", "fullname": "A", "score": 90, "rank": 1,
+                               "percentile": 75.0, "tier": "top"}
+    assert index.rank("c")["rank"] == 2
+    assert index.rank("b")["rank"] == 2
+    assert index.rank("d")["percentile"] == 0.0
+    assert index.rank("e") is None
+
+def test_update_moves_developers(tmp_path):
+    index = make_index(tmp_path, [{"username": "a", "fullname": "A", "score": 90},
+                                  {"username": "b", "fullname": "B", "score": 50}])
+
+    index.update([{"username": "b", "score": 95}, {"username": "c", "fullname": "C", "score": 70},
+                  {"username": "a", "score": None}])
+
+    assert [entry["username"] for entry in index.entries()] == ["b", "c"]
+    assert index.rank("b")["fullname"] == "B"
+
+def test_index_is_persisted_and_detects_stale_source(tmp_path):
+    index = make_index(tmp_path, [{"username": "a", "fullname": "A", "score": 90}])
+
+    reloaded = RankIndex(index.filepath, index.source_path)
+    assert reloaded.is_current()
+    assert reloaded.rank("a")["score"] == 90
+
+    (tmp_path / "developers.csv").write_text("edited by hand")
+    import os
+    os.utime(index.source_path, ns=(0, 0))
+    assert not RankIndex(index.filepath, index.source_path).is_current()
+
+def test_tiers_match_categorize_developers(tmp_path):
+    rng = random.Random(7)
+    records = [{"username": f"user{i}", "fullname": f"User {i}", "score": score}
+               for i, score in enumerate(rng.sample(range(1000), 137))]
+    index = make_index(tmp_path, records)
+
+    expected = categorize_developers_batch([r["fullname"] for r in records], [r["score"] for r in records])
+    for category, names in expected.items():
+        assert [entry["fullname"] for entry in index.tier(category)] == names
+    assert [entry["fullname"] for entry in index.top(3)] == expected["top"][:3]
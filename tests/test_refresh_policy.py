@@ -0,0 +1,41 @@
+from datetime import datetime
+from refresh_policy import RefreshPolicy
+
+TODAY = datetime(2025, 6, 30)
+
+def developer(username, last_updated, commits=0, score_delta=None):
+    return {"username": username, "last_updated": last_updated, "commits": commits,
+            "pull_requests": 0, "reviews": 0, "score_delta": score_delta}
+
+def test_tiers_by_activity_and_volatility():
+    policy = RefreshPolicy(today=TODAY)
+    assert policy.tier(developer("a", None, commits=80)) == "active"
+    assert policy.tier(developer("b", None, commits=3, score_delta=-12)) == "active"
+    assert policy.tier(developer("c", None, commits=3)) == "quiet"
+    assert policy.tier(developer("d", None, commits=float("nan"))) == "dormant"
+
+def test_select_skips_developers_not_due():
+    policy = RefreshPolicy(today=TODAY)
+    developers = [
+        developer("active", "2025-06-29", commits=80),
+        developer("quiet", "2025-06-27", commits=3),
+        developer("dormant", "2025-06-10"),
+    ]
+    assert [dev['username'] for dev in policy.select(developers)] == ["active"]
+
+def test_select_orders_by_staleness_within_budget():
+    policy = RefreshPolicy(today=TODAY)
+    developers = [
+        developer("quiet", "2025-06-16", commits=3),      # 14 days, interval 7: 2.0
+        developer("active", "2025-06-27", commits=80),    # 3 days, interval 1: 3.0
+        developer("dormant", "2025-05-01"),               # 60 days, interval 30: 2.0
+        developer("new", float("nan")),
+    ]
+
+    assert [dev['username'] for dev in policy.select(developers)] == ["new", "active", "quiet", "dormant"]
+    assert [dev['username'] for dev in policy.select(developers, budget=2)] == ["new", "active"]
+
+def test_custom_intervals():
+    policy = RefreshPolicy(intervals={"quiet": 1, "dormant": 1}, today=TODAY)
+    developers = [developer("quiet", "2025-06-29", commits=3), developer("dormant", "2025-06-29")]
+    assert len(policy.select(developers)) == 2
@@ -0,0 +1,48 @@
+import gzip
+from response_archive import ResponseArchive
+
+def test_append_and_read_back(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    archive.append("user1", {"commits": 1}, "2025-01-01T00:00:00", None, fetched_at="2025-03-01T00:00:00Z")
+    archive.append("user2", {}, "2025-01-01T00:00:00", "PUBLIC", windows=[30], fetched_at="2025-03-01T00:00:00Z")
+    archive.append("User1", {"commits": 2}, "2025-01-01T00:00:00", None, fetched_at="2025-03-02T00:00:00Z")
+    archive.close()
+
+    latest = archive.latest()
+    assert sorted(latest) == ["user1", "user2"]
+    assert latest["user2"]["windows"] == [30]
+    assert latest["user2"]["privacy"] == "PUBLIC"
+    assert [payload for _, payload in archive.read(latest.values())] == [{}, {"commits": 2}]
+    assert archive.latest(as_of="2025-03-01")["user1"]["fetched_at"] == "2025-03-01T00:00:00Z"
+
+    # The data file is one gzip stream of every payload, in order
+    with gzip.open(tmp_path / "responses.gz", "rt") as data_file:
+        assert data_file.read() == '{"commits": 1}{}{"commits": 2}'
+
+def test_truncated_index_entry_is_ignored(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    archive.append("user1", {"commits": 1}, "2025-01-01T00:00:00", None)
+    archive.close()
+    with open(archive.index_path, "a", encoding="utf-8") as index_file:
+        index_file.write('{"username": "user2", "fetch')
+
+    assert [entry["username"] for entry in archive.entries()] == ["user1"]
+
+def test_append_after_truncated_index_entry_is_readable(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    archive.append("user1", {"commits": 1}, "2025-01-01T00:00:00", None)
+    archive.close()
+    with open(archive.index_path, "a", encoding="utf-8") as index_file:
+        index_file.write('{"username": "user2", "fetch')
+
+    archive.append("user3", {"commits": 3}, "2025-01-01T00:00:00", None)
+    archive.close()
+
+    entries = archive.entries()
+    assert [entry["username"] for entry in entries] == ["user1", "user3"]
+    assert [payload for _, payload in archive.read(entries)] == [{"commits": 1}, {"commits": 3}]
+
+def test_missing_archive_has_no_entries(tmp_path):
+    archive = ResponseArchive(str(tmp_path / "responses.gz"))
+    assert not archive.exists()
+    assert archive.latest() == {}
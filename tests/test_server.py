@@ -0,0 +1,63 @@
+import json
+import urllib.request
+from datetime import datetime
+import pytest
+from storage import open_storage
+from server import ScoreServer
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = open_storage(str(tmp_path / "developers.csv"), None, rank_index=True)
+    storage.save_data([
+        {"username": "user1", "fullname": "User One", "commits": 10, "score": 40, "last_updated": "2020-01-01"},
+        {"username": "user2", "fullname": "User Two", "commits": 10, "score": 20,
+         "last_updated": datetime.now().strftime('%Y-%m-%d')},
+    ])
+    return storage
+
+def refreshed(developers):
+    return [{**developer, "score": 90, "last_updated": datetime.now().strftime('%Y-%m-%d')}
+            for developer in developers]
+
+def test_refresh_once_updates_memory_and_storage(storage):
+    server = ScoreServer(storage, refreshed, port=0)
+
+    assert server.refresh_once() == 0
+    assert server.lookup("user1")["score"] == 90
+    assert server.lookup("user1")["rank"] == 1
+    assert storage.load_data().set_index("username").loc["user1", "score"] == 90
+    assert server.refresh_once() == 0
+    server._server.server_close()
+
+def test_failed_developers_wait_before_retrying(storage):
+    calls = []
+    server = ScoreServer(storage, lambda developers: calls.append(developers) or [], port=0)
+
+    server.refresh_once()
+    server.refresh_once()
+
+    assert len(calls) == 1
+    server._server.server_close()
+
+def test_next_delay_spreads_remaining_batches_over_the_day(storage):
+    noon = datetime.now().replace(hour=12, minute=0, second=0, microsecond=0).timestamp()
+    server = ScoreServer(storage, refreshed, batch_size=10, port=0, clock=lambda: noon)
+
+    assert server.next_delay(100) == pytest.approx(12 * 3600 / 10)
+    assert server.next_delay(0) == ScoreServer.MAX_SLEEP
+    server._server.server_close()
+
+def test_http_lookup(storage):
+    server = ScoreServer(storage, refreshed, port=0).start()
+    try:
+        with urllib.request.urlopen(f"{server.url}/developers/user2") as response:
+            body = json.loads(response.read())
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"{server.url}/developers/nobody")
+    finally:
+        server.stop()
+
+    assert body["fullname"] == "User Two"
+    assert body["tier"] in ("top", "above_average")
+    assert body["manager"] is None
+    assert error.value.code == 404
@@ -0,0 +1,40 @@
+import os
+import pandas as pd
+from csv_handler import CSVHandler
+from sharding import find_shards, merge_shards, select_shard, shard_of, shard_path
+
+def test_shard_of_is_stable_and_case_insensitive():
+    assert shard_of("Octocat", 4) == shard_of("octocat", 4)
+    assert shard_of("octocat", 4) == 1627039078 % 4
+
+def test_select_shard_partitions_developers():
+    developers = [{"username": f"user{i}"} for i in range(100)]
+    shards = [select_shard(developers, index, 3) for index in range(3)]
+
+    assert sorted(dev['username'] for shard in shards for dev in shard) == sorted(d['username'] for d in developers)
+    assert all(shards)
+
+def test_find_shards_orders_by_index(tmp_path):
+    data_path = str(tmp_path / "developers.csv")
+    for index in (10, 2, 0):
+        open(shard_path(data_path, index, 12), "w").close()
+    open(str(tmp_path / "other.shard-1-of-12.csv"), "w").close()
+
+    assert find_shards(data_path) == [shard_path(data_path, index, 12) for index in (0, 2, 10)]
+
+def test_merge_shards_upserts_and_removes_shards(tmp_path):
+    data_path = str(tmp_path / "developers.csv")
+    storage = CSVHandler(data_path, None)
+    storage.save_data([
+        {"username": "user1", "fullname": "User One", "score": 10},
+        {"username": "user2", "fullname": "User Two", "score": 20},
+    ])
+    first, second = shard_path(data_path, 0, 2), shard_path(data_path, 1, 2)
+    CSVHandler(first, None).save_data([{"username": "user1", "fullname": "User One", "score": 50}])
+    CSVHandler(second, None).save_data([{"username": "user3", "fullname": "User Three", "score": 70}])
+
+    assert merge_shards(storage, [first, second]) == 2
+
+    df = pd.read_csv(data_path).set_index('username')
+    assert df['score'].to_dict() == {"user2": 20, "user1": 50, "user3": 70}
+    assert not os.path.exists(first) and not os.path.exists(second)
@@ -0,0 +1,121 @@
+import pytest
+import pandas as pd
+from datetime import datetime
+from csv_handler import CSVHandler, SCHEMA
+from sqlite_handler import SQLiteHandler
+from storage import StorageHandler, open_storage
+
+@pytest.fixture
+def sqlite_handler(tmp_path):
+    handler = SQLiteHandler(str(tmp_path / "developers.db"), "fullname")
+    yield handler
+    handler.close()
+
+@pytest.fixture
+def test_data():
+    return [
+        {
+            "username": "user1",
+            "fullname": "User One",
+            "commits": 10,
+            "pull_requests": 5,
+            "reviews": 1,
+            "repositories_contributed": 2,
+            "lines_added": 100,
+            "lines_removed": 50,
+            "score": 20,
+            "last_updated": "2025-04-20",
+            "manager": "Manager A"
+        },
+        {
+            "username": "user2",
+            "fullname": "User Two",
+            "score": 90,
+            "last_updated": datetime.now().strftime('%Y-%m-%d'),
+            "manager": "Manager B"
+        },
+        {
+            "username": "user3",
+            "fullname": "User Three",
+            "last_updated": None
+        }
+    ]
+
+def test_open_storage_picks_backend_from_extension(tmp_path):
+    assert isinstance(open_storage(str(tmp_path / "developers.db"), None), SQLiteHandler)
+    assert isinstance(open_storage(str(tmp_path / "developers.csv"), None), CSVHandler)
+
+def test_storage_handler_requires_the_interface():
+    class PartialHandler(StorageHandler):
+        def load_data(self):
+            return None
+
+    with pytest.raises(TypeError):
+        PartialHandler()
+
+def test_load_data_empty(sqlite_handler):
+    df = sqlite_handler.load_data()
+    assert df.empty
+    assert list(df.columns) == SCHEMA
+
+def test_append_metrics_upserts_rows(sqlite_handler, test_data):
+    sqlite_handler.save_data(test_data)
+    sqlite_handler.append_metrics([
+        {"username": "user1", "fullname": "User One Updated", "score": 40, "last_updated": "2025-04-21"},
+        {"username": "user4", "fullname": "User Four", "score": 10, "last_updated": "2025-04-21"}
+    ])
+
+    df = sqlite_handler.load_data()
+    assert len(df) == 4
+    assert df[df['username'] == "user1"].iloc[0]['fullname'] == "User One Updated"
+    assert df[df['username'] == "user1"].iloc[0]['score'] == 40
+
+def test_filter_by_last_updated_skips_today(sqlite_handler, test_data):
+    sqlite_handler.save_data(test_data)
+    usernames = [dev['username'] for dev in sqlite_handler.filter_by_last_updated()]
+    assert sorted(usernames) == ["user1", "user3"]
+
+def test_get_developers_with_scores(sqlite_handler, test_data):
+    sqlite_handler.save_data(test_data)
+    developers = sqlite_handler.get_developers_with_scores()
+    assert developers == [
+        {'fullname': 'User One', 'score': 20},
+        {'fullname': 'User Three', 'score': None},
+        {'fullname': 'User Two', 'score': 90}
+    ]
+
+def test_csv_round_trip(sqlite_handler, test_data, tmp_path):
+    csv_path = str(tmp_path / "developers.csv")
+    CSVHandler(csv_path, None).save_data(test_data)
+
+    sqlite_handler.import_csv(csv_path)
+    exported_path = str(tmp_path / "exported.csv")
+    sqlite_handler.export_csv(exported_path)
+
+    df = pd.read_csv(exported_path)
+    assert list(df.columns) == SCHEMA
+    assert df['username'].tolist() == ["user1", "user3", "user2"]
+    assert df.iloc[0]['lines_added'] == 100
+
+def test_append_metrics_adds_window_columns(sqlite_handler, test_data):
+    sqlite_handler.save_data(test_data)
+    sqlite_handler.append_metrics([{"username": "user1", "fullname": "User One", "score": 30, "score_30d": 12}])
+
+    df = sqlite_handler.load_data()
+    assert list(df.columns) == SCHEMA + ["score_30d"]
+    assert df[df['username'] == "user1"].iloc[0]['score_30d'] == 12
+    assert pd.isna(df[df['username'] == "user2"].iloc[0]['score_30d'])
+
+def test_rank_index_is_built_from_existing_data(tmp_path, test_data):
+    from storage import open_storage
+    filepath = str(tmp_path / "developers.db")
+    handler = SQLiteHandler(filepath, None)
+    handler.save_data(test_data)
+    handler.close()
+
+    storage = open_storage(filepath, None, rank_index=True)
+    assert [entry['username'] for entry in storage.rank_index.entries()] == ["user2", "user1"]
+
+    storage.append_metrics([{"username": "user3", "fullname": "User Three", "score": 95}])
+    assert storage.rank_index.rank("user3")["rank"] == 1
+    storage.close()
@@ -0,0 +1,42 @@
+import os
+import subprocess
+import sys
+
+SRC = os.path.join(os.path.dirname(__file__), "..", "src")
+MAIN = os.path.join(SRC, "main.py")
+
+def imported_modules(*args, env=None):
+    """
+    Run python under `-X importtime` and return {module: cumulative microseconds}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True, text=True, env={**os.environ, **(env or {})}, check=True
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+def test_help_does_not_import_heavy_modules():
+    modules = imported_modules(MAIN, "--help")
+    assert "pandas" not in modules
+    assert "numpy" not in modules
+    assert "requests" not in modules
+
+def test_report_only_does_not_import_http_stack(tmp_path):
+    data_file = tmp_path / "developers.csv"
+    data_file.write_text("username,fullname,score\nuser1,User One,10\n")
+
+    modules = imported_modules(MAIN, "--report-only", env={"DATA_FILE_PATH": str(data_file)})
+
+    assert "requests" not in modules
+    assert "urllib3" not in modules
+
+def test_main_import_time_budget():
+    modules = imported_modules("-c", "import main", env={"PYTHONPATH": SRC})
+    # Generous bound: heavy imports add well over a second, the lean CLI a few tens of ms
+    assert modules["main"] < 300000
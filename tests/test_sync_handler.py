@@ -0,0 +1,51 @@
+import pytest
+from sync_handler import PullRequestSync
+
+def make_pr(pr_id, merged_at, additions=10, deletions=5):
+    return {"id": pr_id, "mergedAt": merged_at, "updatedAt": merged_at, "additions": additions, "deletions": deletions}
+
+@pytest.fixture
+def sync(tmp_path):
+    sync = PullRequestSync(str(tmp_path / "sync.db"))
+    yield sync
+    sync.close()
+
+def test_state_is_empty_before_first_sync(sync):
+    assert sync.get_state("user1") == (None, None, None)
+
+def test_save_page_keeps_cursor_until_complete(sync):
+    sync.save_page("user1", [make_pr("pr1", "2025-03-01T00:00:00Z")], "cursor1", "2025-03-01T00:00:00Z")
+    assert sync.get_state("user1") == (None, "cursor1", "2025-03-01T00:00:00Z")
+
+    sync.complete("user1", "2025-03-01T00:00:00Z")
+    assert sync.get_state("user1") == ("2025-03-01T00:00:00Z", None, None)
+
+def test_complete_records_synced_window(sync):
+    assert sync.synced_since("user1") is None
+    sync.complete("user1", "2025-03-01T00:00:00Z", "2025-01-01T00:00:00Z")
+    assert sync.synced_since("User1") == "2025-01-01T00:00:00Z"
+
+def test_adds_synced_since_to_older_stores(tmp_path):
+    import sqlite3
+    connection = sqlite3.connect(tmp_path / "sync.db")
+    connection.execute("CREATE TABLE sync_state (username TEXT PRIMARY KEY, watermark TEXT, cursor TEXT, "
+                       "pending_watermark TEXT)")
+    connection.execute("INSERT INTO sync_state (username, watermark) VALUES ('user1', '2025-03-01T00:00:00Z')")
+    connection.commit()
+    connection.close()
+
+    sync = PullRequestSync(str(tmp_path / "sync.db"))
+    assert sync.synced_since("user1") is None
+    assert sync.get_state("user1") == ("2025-03-01T00:00:00Z", None, None)
+    sync.close()
+
+def test_line_totals_cover_window(sync):
+    sync.save_page("user1", [
+        make_pr("pr1", "2025-03-01T00:00:00Z", 100, 50),
+        make_pr("pr2", "2025-01-01T00:00:00Z", 10, 5),
+        make_pr("pr1", "2025-03-01T00:00:00Z", 100, 50),
+    ], None, None)
+
+    assert sync.line_totals("user1", "2025-02-01T00:00:00Z") == {"lines_added": 100, "lines_removed": 50}
+    assert sync.line_totals("user1", "2024-01-01T00:00:00Z") == {"lines_added": 110, "lines_removed": 55}
+    assert sync.line_totals("user2", "2024-01-01T00:00:00Z") == {"lines_added": 0, "lines_removed": 0}
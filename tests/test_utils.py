@@ -1,5 +1,10 @@
 import pytest
-from utils import calculate_productivity_score, categorize_developers
+import numpy as np
+import pandas as pd
+from utils import (
+    calculate_productivity_score, calculate_productivity_scores,
+    categorize_developers, categorize_developers_batch
+)
 
 def test_min_values():
     """Test with all input values set to 0. The score should be 0."""
@@ -87,4 +92,34 @@ def test_categorize_developers():
     assert len(categories['bottom']) == 2  # 20%
     
     assert 'Dev1' in categories['top']
-    assert 'Dev10' in categories['bottom']
\ No newline at end of file
+    assert 'Dev10' in categories['bottom']
+
+def random_metrics(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'commits': rng.integers(0, 1000, count),
+        'pull_requests': rng.integers(0, 150, count),
+        'reviews': rng.integers(0, 150, count),
+        'repositories_contributed': rng.integers(0, 40, count),
+        'lines_added': rng.integers(0, 400000, count),
+        'lines_removed': rng.integers(0, 400000, count),
+    })
+
+def test_calculate_productivity_scores_matches_scalar():
+    metrics = random_metrics(2000)
+    scores = calculate_productivity_scores(metrics)
+    expected = [calculate_productivity_score(**row) for row in metrics.to_dict(orient='records')]
+    assert scores.tolist() == expected
+
+@pytest.mark.parametrize("count", [1, 2, 3, 7, 10, 11, 99, 1000])
+def test_categorize_developers_batch_matches_scalar(count):
+    rng = np.random.default_rng(count)
+    # Few distinct scores, so ties straddle the category boundaries
+    scores = rng.integers(0, 5, count).tolist()
+    developers = [{'fullname': f'Dev{i}', 'score': score} for i, score in enumerate(scores)]
+
+    expected = categorize_developers(developers)
+    assert categorize_developers_batch([d['fullname'] for d in developers], scores) == expected
+
+def test_categorize_developers_batch_empty():
+    assert categorize_developers_batch([], []) == {}